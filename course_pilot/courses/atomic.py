@@ -0,0 +1,37 @@
+"""
+Atomic file writes: readers (other workers included) see either the previous file or
+the complete new one, never a partial write.
+"""
+import os
+import shutil
+import tempfile
+
+
+def write_atomic(path, data, max_bytes=None, mode=None):
+    """
+    Write `data` to `path` via a temp file in the same directory + rename, and return
+    the number of bytes written. `data` is bytes, a readable binary file object (copied
+    from its current position) or an iterable of bytes chunks. Raises OSError, leaving
+    `path` untouched, if more than `max_bytes` were written. `mode` sets the file's
+    permissions (mkstemp creates files readable by their owner only).
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            elif hasattr(data, "read"):
+                shutil.copyfileobj(data, f)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            size = f.tell()
+        if max_bytes is not None and size > max_bytes:
+            raise OSError(f"{size} bytes is more than the limit of {max_bytes}")
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return size
@@ -0,0 +1,293 @@
+import hashlib
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+
+def file_digest(path):
+    """Short SHA-256 of a file's bytes, used as the dataset version."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def deep_sizeof(obj):
+    """Approximate bytes of nested dicts / tuples / lists of arrays, strings and ints."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key) + deep_sizeof(value) for key, value in obj.items())
+    elif isinstance(obj, (tuple, list)):
+        size += sum(deep_sizeof(item) for item in obj)
+    return size
+
+
+class ProgrammeRecord:
+    """One parsed CSV row. Strings are interned; requirements are compiled OR-groups."""
+
+    __slots__ = ("programme_code", "programme_name", "university", "cluster_points", "requirements")
+
+    def __init__(self, programme_code, programme_name, university, cluster_points, requirements):
+        self.programme_code = sys.intern(programme_code)
+        self.programme_name = sys.intern(programme_name)
+        self.university = sys.intern(university)
+        self.cluster_points = cluster_points
+        self.requirements = requirements
+
+
+TEXT_FIELDS = ("programme_code", "programme_name", "university")
+SORT_KEYS = ("csv", "cutoff", "university", "name")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def signature_dominates(strong, weak):
+    """
+    True when every student meeting requirement signature `strong` also meets `weak`:
+    each OR-group of `weak` has a group in `strong` over a subset of its subjects at a
+    grade at least as high.
+    """
+    return all(
+        any(set(subjects) <= set(weak_subjects) and value >= weak_value for subjects, value in strong)
+        for weak_subjects, weak_value in weak
+    )
+
+
+class Catalogue:
+    """
+    Programmes loaded from the cluster CSV, packed into parallel columns, plus the indexes
+    built over them at load time. Programme ids are positions in the original CSV order.
+
+    Columns (the same layout snapshot.py writes to disk):
+        _cutoffs                 cluster points in CSV order
+        by_cutoff / cutoffs      programme ids sorted by cutoff, and those cutoffs (for bisect)
+        _req_offsets             programme -> slice of OR-groups
+        _group_values            required grade value per OR-group
+        _group_offsets           OR-group -> slice of _group_subjects
+        _group_subjects          subject ids
+        _text_ids                (code, name, university) string ids, 3 per programme
+        signature_ids            programme -> requirement signature id
+        signature_programmes     signature id -> first programme carrying it
+        by_university / by_name  programme ids in (university, name, code) and
+                                 (name, university, code) order, for sorted responses
+    Strings are stored once each, so a university name costs one object however many
+    programmes it offers. Likewise programmes with the same normalized requirements share
+    a signature, so a request checks each distinct rule set once (685 rows, 17 signatures
+    in the current CSV).
+
+    stronger[r] / weaker[r] hold the signatures dominating / dominated by signature r
+    (see signature_dominates). They are derived at load, snapshot or not, since there
+    are only a handful of signatures. So are the inverted indexes behind the filters
+    and lookups: university, programme name token and programme code -> programme ids.
+
+    SnapshotCatalogue (snapshot.py) backs the same columns with a memory-mapped file.
+    """
+
+    def __init__(self, programmes, version=None, subject_ids=None):
+        self.version = version
+        # Canonical subject code -> id used inside compiled requirements
+        self.subject_ids = dict(subject_ids or {})
+
+        strings = {}
+        self._cutoffs = array("d")
+        self._req_offsets = array("I", [0])
+        self._group_values = array("b")
+        self._group_offsets = array("I", [0])
+        self._group_subjects = array("H")
+        self._text_ids = array("I")
+
+        for prog in programmes:
+            self._cutoffs.append(prog.cluster_points)
+            for subject_ids, required_value in prog.requirements:
+                self._group_subjects.extend(subject_ids)
+                self._group_offsets.append(len(self._group_subjects))
+                self._group_values.append(required_value)
+            self._req_offsets.append(len(self._group_values))
+            for field in TEXT_FIELDS:
+                self._text_ids.append(strings.setdefault(getattr(prog, field), len(strings)))
+
+        self._strings = tuple(strings)
+
+        cutoffs = self._cutoffs
+        self.by_cutoff = array("I", sorted(range(len(cutoffs)), key=cutoffs.__getitem__))
+        self.cutoffs = array("d", (cutoffs[i] for i in self.by_cutoff))
+
+        def text_key(*fields):
+            positions = [TEXT_FIELDS.index(field) for field in fields]
+            return lambda p: tuple(self._strings[self._text_ids[3 * p + i]] for i in positions)
+
+        ids = range(len(cutoffs))
+        self.by_university = array("I", sorted(ids, key=text_key("university", "programme_name", "programme_code")))
+        self.by_name = array("I", sorted(ids, key=text_key("programme_name", "university", "programme_code")))
+
+        signatures = {}
+        self.signature_ids = array("I")
+        self.signature_programmes = array("I")
+        for prog_id in range(len(cutoffs)):
+            key = self.requirement_signature(prog_id)
+            if key not in signatures:
+                signatures[key] = len(self.signature_programmes)
+                self.signature_programmes.append(prog_id)
+            self.signature_ids.append(signatures[key])
+
+        self._index_dominance()
+        self._index_text()
+
+    def __len__(self):
+        return len(self.by_cutoff)
+
+    def _string(self, string_id):
+        return self._strings[string_id]
+
+    def reachable_count(self, cluster_points):
+        """Number of programmes whose cutoff is at or below the student's cluster points."""
+        return bisect_right(self.cutoffs, cluster_points)
+
+    def within_cutoff(self, cluster_points):
+        """Ids of the programmes the student's cluster points reach, lowest cutoff first."""
+        return self.by_cutoff[:self.reachable_count(cluster_points)]
+
+    def sort_order(self, key):
+        """All programme ids in one of the SORT_KEYS orders, precomputed at load."""
+        if key == "cutoff":
+            return self.by_cutoff
+        if key == "university":
+            return self.by_university
+        if key == "name":
+            return self.by_name
+        return range(len(self))
+
+    def cluster_points(self, prog_id):
+        return self._cutoffs[prog_id]
+
+    def requirements(self, prog_id):
+        """Compiled (subject_ids, required_value) OR-groups of one programme."""
+        groups = []
+        for g in range(self._req_offsets[prog_id], self._req_offsets[prog_id + 1]):
+            subjects = self._group_subjects[self._group_offsets[g]:self._group_offsets[g + 1]]
+            groups.append((subjects, self._group_values[g]))
+        return groups
+
+    def requirement_signature(self, prog_id):
+        """Order-insensitive, duplicate-free form of a programme's requirements."""
+        return tuple(sorted({
+            (tuple(sorted(set(subjects))), required_value)
+            for subjects, required_value in self.requirements(prog_id)
+        }))
+
+    def _index_dominance(self):
+        keys = [self.requirement_signature(prog_id) for prog_id in self.signature_programmes]
+        pairs = [
+            (strong, weak)
+            for strong in range(len(keys)) for weak in range(len(keys))
+            if strong != weak and signature_dominates(keys[strong], keys[weak])
+        ]
+        self.stronger = tuple(tuple(s for s, w in pairs if w == r) for r in range(len(keys)))
+        self.weaker = tuple(tuple(w for s, w in pairs if s == r) for r in range(len(keys)))
+
+    def _index_text(self):
+        universities = defaultdict(list)
+        tokens = defaultdict(list)
+        codes = defaultdict(list)
+        for prog_id in range(len(self)):
+            summary = self.summary(prog_id)
+            codes[summary["programme_code"]].append(prog_id)
+            universities[summary["university"].lower()].append(prog_id)
+            for token in set(TOKEN_RE.findall(summary["programme_name"].lower())):
+                tokens[token].append(prog_id)
+        self.university_index = {name: array("I", ids) for name, ids in universities.items()}
+        self.token_index = {token: array("I", ids) for token, ids in tokens.items()}
+        self._sorted_tokens = sorted(self.token_index)
+        # Every row is kept, so a code repeated in the CSV maps to all of its rows
+        self.code_index = {code: tuple(ids) for code, ids in codes.items()}
+
+    def programme_ids(self, code):
+        """Ids of the rows carrying this programme code (normally exactly one)."""
+        return self.code_index.get(str(code).strip(), ())
+
+    def duplicate_codes(self):
+        """{programme code: number of rows} for codes that appear on more than one row."""
+        return {code: len(ids) for code, ids in self.code_index.items() if len(ids) > 1}
+
+    def university_ids(self, names):
+        """Ids of the programmes offered by any of `names` (case-insensitive)."""
+        ids = set()
+        for name in names:
+            ids.update(self.university_index.get(name.strip().lower(), ()))
+        return ids
+
+    def keyword_ids(self, keyword):
+        """Ids whose programme name has a word starting with every word of `keyword`."""
+        ids = None
+        for word in TOKEN_RE.findall(keyword.lower()):
+            matches = set()
+            start = bisect_left(self._sorted_tokens, word)
+            for token in self._sorted_tokens[start:]:
+                if not token.startswith(word):
+                    break
+                matches.update(self.token_index[token])
+            ids = matches if ids is None else ids & matches
+        return ids if ids is not None else set(range(len(self)))
+
+    def cutoff_range_ids(self, low=None, high=None):
+        """Ids whose cutoff lies in [low, high], either bound optional."""
+        start = 0 if low is None else bisect_left(self.cutoffs, low)
+        end = len(self) if high is None else bisect_right(self.cutoffs, high)
+        return self.by_cutoff[start:end]
+
+    def university(self, prog_id):
+        return self._string(self._text_ids[len(TEXT_FIELDS) * prog_id + 2])
+
+    @property
+    def num_signatures(self):
+        return len(self.signature_programmes)
+
+    def signature_requirements(self, signature_id):
+        """Compiled OR-groups shared by every programme with this signature."""
+        return self.requirements(self.signature_programmes[signature_id])
+
+    def programme_code(self, prog_id):
+        return self._string(self._text_ids[len(TEXT_FIELDS) * prog_id])
+
+    def summary(self, prog_id):
+        base = len(TEXT_FIELDS) * prog_id
+        return {
+            "programme_code": self._string(self._text_ids[base]),
+            "programme_name": self._string(self._text_ids[base + 1]),
+            "university": self._string(self._text_ids[base + 2]),
+            "cluster_points": self._cutoffs[prog_id],
+        }
+
+    def memory_report(self):
+        """
+        Approximate bytes held for the catalogue. Everything here is private to this
+        process: the columns, the strings and the indexes built at load.
+        """
+        columns = (
+            self._cutoffs, self.by_cutoff, self.cutoffs, self._req_offsets, self._group_values,
+            self._group_offsets, self._group_subjects, self._text_ids, self.signature_ids,
+            self.signature_programmes, self.by_university, self.by_name,
+        )
+        total = sum(sys.getsizeof(column) for column in columns)
+        total += sys.getsizeof(self._strings) + sum(sys.getsizeof(s) for s in self._strings)
+        return self._report(shared_bytes=0, private_bytes=total + self._index_bytes(), backing="memory")
+
+    def _index_bytes(self):
+        """Bytes of the structures every process derives at load, snapshot or not."""
+        indexes = (self.subject_ids, self.university_index, self.token_index, self.code_index,
+                   self.stronger, self.weaker)
+        # _sorted_tokens shares its strings with token_index
+        return deep_sizeof(indexes) + sys.getsizeof(self._sorted_tokens)
+
+    def _report(self, shared_bytes, private_bytes, backing):
+        total_bytes = shared_bytes + private_bytes
+        return {
+            "backing": backing,
+            "programmes": len(self),
+            "shared_bytes": shared_bytes,
+            "private_bytes": private_bytes,
+            "total_bytes": total_bytes,
+            "bytes_per_programme": round(total_bytes / len(self), 1) if len(self) else 0,
+        }
@@ -0,0 +1,153 @@
+"""
+KUCCPS weighted cluster points, computed server-side from a student's KCSE grades.
+
+Cluster definitions (clusters 1-20, four subject slots each) are parsed once from
+KUCCPS_Requirements_Cleaned.csv. A slot such as "MAT ALTERNATIVE A/B or any GROUP II"
+becomes the set of subject codes allowed in it, and each slot needs a different subject.
+
+The KUCCPS formula is
+
+    cluster points = 48 * sqrt((r / 48) * (t / 84))
+
+where r is the best total of the four cluster subjects (12 points max each) and t is
+the student's aggregate over their best seven subjects.
+"""
+import csv
+import math
+import re
+from functools import lru_cache
+from itertools import permutations
+
+import numpy as np
+
+# KCSE subject groups, as canonical codes (see ALIAS_TO_CODE in views.py)
+SUBJECT_GROUPS = {
+    "I": ("ENG", "KIS", "MAT"),
+    "II": ("BIO", "PHY", "CHE", "GSC"),
+    "III": ("HIS", "GEO", "CRE", "IRE", "HRE"),
+    "IV": ("HSC", "ARD", "AGR", "CS", "AVT", "DRD", "ELC", "PWT", "WWK", "MWK", "BCN"),
+    "V": ("FRE", "GER", "ARB", "KSL", "MUS", "MUC", "BST"),
+}
+GROUP_NUMERALS = {"1": "I", "2": "II", "3": "III", "4": "IV", "5": "V"}
+
+# Spellings used in the requirements PDF that are not three-letter codes
+TOKEN_ALIASES = {"AGRIC": "AGR", "MATH": "MAT", "MATHEMATICS": "MAT", "FRENCH": "FRE",
+                 "GERMAN": "GER", "MUSIC": "MUS", "COMP": "CS"}
+
+CLUSTER_SLOTS = 4
+MAX_SUBJECT_POINTS = 12
+AGGREGATE_SUBJECTS = 7
+MAX_SUBJECTS = 9  # KCSE candidates sit at most nine subjects
+
+GROUP_RE = re.compile(r"GROUP\s+(V|IV|III|II|I|[1-5])\b")
+CODE_RE = re.compile(r"\b[A-Z]{2,11}\b")
+GRADE_SUFFIX_RE = re.compile(r"\s[-–]\s*[A-E][+-]?(\s*\(PLAIN\))?\s*$")
+
+
+def parse_slot(text, canonical):
+    """'MAT ALTERNATIVE A/B or any GROUP II' -> frozenset of canonical subject codes."""
+    text = " ".join(text.upper().split())
+    text = re.sub(r"^SUBJECT\s+\d\s*", "", text)
+    text = GRADE_SUFFIX_RE.sub("", text)
+
+    codes = set()
+    for group in GROUP_RE.findall(text):
+        codes.update(SUBJECT_GROUPS[GROUP_NUMERALS.get(group, group)])
+    text = GROUP_RE.sub(" ", text)
+
+    for token in CODE_RE.findall(text):
+        token = TOKEN_ALIASES.get(token, token)
+        if token in ("ANY", "OR", "ALTERNATIVE", "ND", "RD", "SUBJECT"):
+            continue
+        code = canonical(token)
+        if any(code in members for members in SUBJECT_GROUPS.values()):
+            codes.add(code)
+    return frozenset(codes)
+
+
+def load_cluster_definitions(csv_file, canonical=lambda code: code):
+    """
+    Returns {cluster: [slot codes, ...]} from the rows whose first column is a cluster
+    number and whose subject columns read "Subject 1 ...", "Subject 2 ..." etc.
+    """
+    definitions = {}
+    with open(csv_file, "r", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 + CLUSTER_SLOTS or not row[0].strip().isdigit():
+                continue
+            cells = row[2:2 + CLUSTER_SLOTS]
+            if not all(cell.strip().upper().startswith("SUBJECT") for cell in cells):
+                continue
+            definitions.setdefault(row[0].strip(), [parse_slot(cell, canonical) for cell in cells])
+    return definitions
+
+
+@lru_cache(maxsize=MAX_SUBJECTS + 1)
+def _assignments(num_subjects):
+    """Every way of placing distinct subjects in the four slots, as an (m, 4) index array."""
+    return np.array(list(permutations(range(num_subjects), CLUSTER_SLOTS)), dtype=np.intp).reshape(-1, CLUSTER_SLOTS)
+
+
+class ClusterCalculator:
+    """Weighted cluster points for every cluster in one vectorized pass per student."""
+
+    def __init__(self, definitions, version=None):
+        self.version = version
+        self.clusters = list(definitions)
+        self.codes = sorted({code for slots in definitions.values() for slot in slots for code in slot})
+        code_index = {code: i for i, code in enumerate(self.codes)}
+
+        # slot_codes[c, s, k]: code k may fill slot s of cluster c
+        self.slot_codes = np.zeros((len(self.clusters), CLUSTER_SLOTS, len(self.codes)), dtype=bool)
+        for c, cluster in enumerate(self.clusters):
+            for s, slot in enumerate(definitions[cluster]):
+                self.slot_codes[c, s, [code_index[code] for code in slot]] = True
+        self._code_index = code_index
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def scores(self, subjects):
+        """
+        subjects: [(codes, points)] with one entry per KCSE subject the student sat
+        (several codes when a subject name maps to more than one, e.g. CRE/IRE).
+        Returns ({cluster: points or None}, aggregate); None when no valid set of four
+        distinct subjects fills that cluster's slots.
+        Raises ValueError for more than MAX_SUBJECTS subjects.
+        """
+        if len(subjects) > MAX_SUBJECTS:
+            raise ValueError(f"At most {MAX_SUBJECTS} subjects can be graded, got {len(subjects)}")
+
+        points = np.array([p for _, p in subjects], dtype=np.float64)
+        aggregate = float(np.sort(points)[::-1][:AGGREGATE_SUBJECTS].sum()) if len(points) else 0.0
+
+        # Subjects no slot accepts only count towards the aggregate
+        slotted = [
+            ([self._code_index[code] for code in codes if code in self._code_index], p)
+            for codes, p in subjects
+        ]
+        slotted = [(indexes, p) for indexes, p in slotted if indexes]
+        if len(slotted) < CLUSTER_SLOTS or not aggregate:
+            return {cluster: None for cluster in self.clusters}, aggregate
+
+        # fits[c, s, j]: the student's subject j may fill slot s of cluster c
+        points = np.array([p for _, p in slotted], dtype=np.float64)
+        member = np.zeros((len(self.codes), len(slotted)), dtype=bool)
+        for j, (indexes, _) in enumerate(slotted):
+            member[indexes, j] = True
+        fits = (self.slot_codes[:, :, :, None] & member[None, None, :, :]).any(axis=2)
+        slot_points = np.where(fits, points, -np.inf)
+
+        assignment = _assignments(len(slotted))
+        totals = sum(slot_points[:, s, assignment[:, s]] for s in range(CLUSTER_SLOTS))
+        best = totals.max(axis=1)
+
+        scale = CLUSTER_SLOTS * MAX_SUBJECT_POINTS
+        aggregate_scale = AGGREGATE_SUBJECTS * MAX_SUBJECT_POINTS
+        result = {}
+        for cluster, r in zip(self.clusters, best):
+            if math.isfinite(r):
+                result[cluster] = round(scale * math.sqrt((r / scale) * (aggregate / aggregate_scale)), 3)
+            else:
+                result[cluster] = None
+        return result, aggregate
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class LoadedDataset:
+    """
+    One loaded catalogue version with the engine, cluster calculator and search index built for it.
+    Never mutated after creation, except that the cluster calculator is built on first use:
+    it needs numpy, which workers that never calculate cluster points do not import.
+    """
+
+    def __init__(self, catalogue, engine=None, source=None, load_seconds=0.0, load_calculator=None, search=None):
+        self.catalogue = catalogue
+        self.engine = engine
+        self.search = search
+        self._load_calculator = load_calculator  # () -> ClusterCalculator or None
+        self._calculator = None
+        self._calculator_lock = threading.Lock()
+        self.source = source
+        self.version = catalogue.version
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now(timezone.utc)
+
+    @property
+    def calculator(self):
+        """The cluster points calculator, or None when it cannot be loaded."""
+        if self._load_calculator is not None:
+            with self._calculator_lock:
+                if self._load_calculator is not None:
+                    self._calculator = self._load_calculator()
+                    self._load_calculator = None  # loaded, or failed: either way only once
+        return self._calculator
+
+
+class DatasetManager:
+    """
+    Serves the active LoadedDataset and swaps in new ones without restarting workers.
+
+    Nothing is loaded until the first current() call (or warm_up(), which serving
+    processes call before taking traffic), so importing the views stays cheap for
+    manage.py commands, migrations and the test runner.
+
+    Requests call current() once and use the returned object throughout, so an in-flight
+    request always sees one consistent version; a reload replaces the reference in a
+    single assignment. At most every `check_interval` seconds current() stats the watched
+    files and, if they changed, rebuilds in a background thread while requests keep
+    using the old version. check_interval=0 turns the file check off.
+    """
+
+    def __init__(self, build, watched_paths, check_interval=30):
+        self._build = build                  # () -> LoadedDataset
+        self._watched_paths = watched_paths  # () -> list of file paths
+        self.check_interval = check_interval
+        self._current = None
+        self._fingerprint = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.last_error = None
+        self.warmup_seconds = None
+
+    def _stat_fingerprint(self):
+        fingerprint = []
+        for path in self._watched_paths():
+            try:
+                st = os.stat(path)
+                fingerprint.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                fingerprint.append((path, None, None))
+        return tuple(fingerprint)
+
+    def current(self):
+        if self._current is None:
+            with self._reload_lock:
+                if self._current is None:
+                    self._reload_locked()
+            return self._current
+
+        if self.check_interval and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.check_interval
+            if self._stat_fingerprint() != self._fingerprint:
+                self.reload_in_background()
+        return self._current
+
+    def warm_up(self):
+        """Load the dataset ahead of the first request; returns (and records) the seconds taken."""
+        started = time.perf_counter()
+        self.current()
+        self.warmup_seconds = time.perf_counter() - started
+        return self.warmup_seconds
+
+    def reload(self):
+        """Build a new dataset on the calling thread and swap it in. Returns the active dataset."""
+        with self._reload_lock:
+            return self._reload_locked()
+
+    def reload_in_background(self):
+        if not self._reload_lock.acquire(blocking=False):
+            return  # a reload is already running
+
+        def run():
+            try:
+                self._reload_locked()
+            finally:
+                self._reload_lock.release()
+
+        threading.Thread(target=run, name="dataset-reload", daemon=True).start()
+
+    def _reload_locked(self):
+        try:
+            dataset = self._build()
+        except Exception as e:
+            if self._current is None:
+                raise
+            # Keep serving the previous version
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"❌ Dataset reload failed: {e}")
+            return self._current
+
+        # Taken after the build, which may itself (re)write a watched snapshot
+        self._fingerprint = self._stat_fingerprint()
+        self._next_check = time.monotonic() + self.check_interval
+        if self._current is not None:
+            self.reloads += 1
+        self.last_error = None
+        self._current = dataset
+        return dataset
+
+    def status(self):
+        dataset = self._current
+        return {
+            'version': dataset.version if dataset else None,
+            'source': dataset.source if dataset else None,
+            'loaded_at': dataset.loaded_at.isoformat() if dataset else None,
+            'load_seconds': round(dataset.load_seconds, 4) if dataset else None,
+            'warmup_seconds': round(self.warmup_seconds, 4) if self.warmup_seconds is not None else None,
+            'reloads': self.reloads,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from course_pilot.courses.snapshot import SnapshotCatalogue, write_snapshot
+from course_pilot.courses.views import compile_catalogue, find_programmes_csv
+
+
+class Command(BaseCommand):
+    help = 'Compile the KUCCPS cluster CSV into the binary catalogue snapshot loaded by the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', help='Cluster points CSV (default: first known location that exists)')
+        parser.add_argument('--output', help='Snapshot path (default: settings.CATALOGUE_SNAPSHOT_PATH)')
+
+    def handle(self, *args, **options):
+        csv_file = options['csv'] or find_programmes_csv()
+        output = options['output'] or getattr(settings, 'CATALOGUE_SNAPSHOT_PATH', '')
+
+        if not csv_file or not os.path.exists(csv_file):
+            raise CommandError("❌ Cluster points CSV not found")
+        if not output:
+            raise CommandError("❌ No output path: pass --output or set CATALOGUE_SNAPSHOT_PATH")
+
+        started = time.perf_counter()
+        catalogue = compile_catalogue(csv_file)
+        if not len(catalogue):
+            raise CommandError(f"❌ No programmes could be parsed from {csv_file}")
+
+        write_snapshot(catalogue, output)
+        built = time.perf_counter() - started
+
+        # Re-open the artefact the way the views do, which also verifies its checksum
+        started = time.perf_counter()
+        snapshot = SnapshotCatalogue(output)
+        mapped = time.perf_counter() - started
+
+        if len(snapshot) != len(catalogue) or snapshot.version != catalogue.version:
+            raise CommandError(f"❌ {output} does not match the compiled CSV")
+        for key in ('cutoff', 'university', 'name'):
+            if list(snapshot.sort_order(key)) != list(catalogue.sort_order(key)):
+                raise CommandError(f"❌ The {key} sort order differs between the CSV and {output}")
+        for prog_id in range(len(catalogue)):
+            if (snapshot.summary(prog_id) != catalogue.summary(prog_id)
+                    or snapshot.signature_ids[prog_id] != catalogue.signature_ids[prog_id]):
+                raise CommandError(f"❌ Programme {prog_id} differs between the CSV and {output}")
+
+        self.stdout.write(f"✅ Compiled {len(catalogue)} programmes from {csv_file} in {built * 1000:.1f} ms")
+        self.stdout.write(f"🧩 {catalogue.num_signatures} distinct requirement signatures")
+        duplicates = catalogue.duplicate_codes()
+        if duplicates:
+            self.stdout.write(f"⚠️ {len(duplicates)} programme codes appear on more than one row: {', '.join(duplicates)}")
+        self.stdout.write(f"📦 Wrote {os.path.getsize(output)} bytes to {output} (dataset {catalogue.version})")
+        self.stdout.write(f"⚡ Snapshot maps in {mapped * 1000:.2f} ms")
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class NumpyEligibility:
+    """
+    Vectorized eligibility over a compiled Catalogue.
+
+    Every distinct OR-group of subject ids becomes a column. `required[r, g]` holds the
+    minimum grade value requirement signature r needs in group g (-1 when it has no such
+    requirement), so a request reduces to the student's best grade per group and a few
+    array comparisons, expanded from signatures to programmes at the end.
+    """
+
+    def __init__(self, catalogue):
+        num_programmes = len(catalogue)
+        group_columns = {}
+        cells = []
+        for signature_id in range(catalogue.num_signatures):
+            for subject_ids, required_value in catalogue.signature_requirements(signature_id):
+                col = group_columns.setdefault(frozenset(subject_ids), len(group_columns))
+                cells.append((signature_id, col, required_value))
+
+        num_subjects = 1 + max((sid for group in group_columns for sid in group), default=-1)
+
+        self.cutoffs = np.array([catalogue.cluster_points(i) for i in range(num_programmes)], dtype=np.float64)
+        self.signature_ids = np.array(catalogue.signature_ids, dtype=np.intp)
+
+        # Repeated groups in one signature collapse to their strictest grade
+        self.required = np.full((catalogue.num_signatures, len(group_columns)), -1, dtype=np.int8)
+        for signature_id, col, required_value in cells:
+            if required_value > self.required[signature_id, col]:
+                self.required[signature_id, col] = required_value
+
+        self.members = np.zeros((len(group_columns), num_subjects), dtype=bool)
+        for group, col in group_columns.items():
+            self.members[col, list(group)] = True
+
+    def evaluate(self, cluster_points, grade_values):
+        """Returns (eligible programme ids in CSV order, programmes failing only on subjects)."""
+        student = np.full(self.members.shape[1], -1, dtype=np.int8)
+        for sid, value in grade_values.items():
+            if sid < len(student):
+                student[sid] = value
+
+        best = np.where(self.members, student, np.int8(-1)).max(axis=1, initial=-1)
+        meets_subjects = (self.required <= best).all(axis=1)[self.signature_ids]
+        # Written as a negated "<" so a NaN input behaves like the Python loop
+        reached = ~(cluster_points < self.cutoffs)
+
+        eligible = np.flatnonzero(reached & meets_subjects).tolist()
+        filtered_out = int(np.count_nonzero(reached & ~meets_subjects))
+        return eligible, filtered_out
@@ -0,0 +1,190 @@
+"""
+Content-addressed cache of rendered PDF reports.
+
+Reports are keyed by a hash of exactly what is drawn on them (see report_key), so
+every student with the same programme list and cluster points shares one render.
+Hot reports stay in memory; everything else goes to a directory on local disk that
+all workers on the machine share. Both tiers are bounded in bytes and evict the
+least recently used reports first.
+
+Reports are handed out as file objects (open) so large ones stream from disk without
+being read into memory; only reports up to max_entry_memory_bytes are held in memory.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .atomic import write_atomic
+
+# Bump when the report layout changes so older renders are not served
+LAYOUT_VERSION = 1
+
+
+def report_key(sorted_unis, cluster_points):
+    """SHA-256 over the layout version, cluster points and the (university, courses) groups."""
+    normalized = [
+        [university, [
+            [course.get("programme_code"), course.get("programme_name"), course.get("cluster_points")]
+            for course in courses
+        ]]
+        for university, courses in sorted_unis
+    ]
+    payload = json.dumps([LAYOUT_VERSION, str(cluster_points), normalized], separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """
+    Two-tier (memory, then disk) byte-bounded LRU of rendered PDFs.
+    max_memory_bytes=0 skips the memory tier; directory="" skips the disk tier.
+    """
+
+    def __init__(self, max_memory_bytes=32 << 20, directory="", max_disk_bytes=512 << 20,
+                 max_entry_memory_bytes=1 << 20):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_entry_memory_bytes = max_entry_memory_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None  # measured on first use
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def open(self, key):
+        """A readable binary file object with the cached report, or None on a miss."""
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return io.BytesIO(pdf)  # shares the bytes, no copy
+
+        f = self._open_disk(key)
+        with self._lock:
+            if f is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            size = os.fstat(f.fileno()).st_size
+            if size <= self.max_entry_memory_bytes:
+                pdf = f.read()
+                f.close()
+                self._remember(key, pdf)
+                return io.BytesIO(pdf)
+        return f
+
+    def put(self, key, pdf):
+        with self._lock:
+            self._remember(key, pdf)
+        self._write_disk(key, pdf)
+
+    def put_file(self, key, f):
+        """Cache the report in readable file `f` (left rewound); large ones go to disk only."""
+        size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        if size <= self.max_entry_memory_bytes:
+            self.put(key, f.read())
+        else:
+            self._write_disk(key, f)
+        f.seek(0)
+
+    def _remember(self, key, pdf):
+        if len(pdf) > min(self.max_memory_bytes, self.max_entry_memory_bytes):
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = pdf
+        self._memory_bytes += len(pdf)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _open_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+            os.utime(path)  # recently used, evicted last
+            return f
+        except OSError:
+            return None
+
+    def _write_disk(self, key, pdf):
+        """Store bytes or the contents of a readable file object on the disk tier."""
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            size = write_atomic(self._path(key), pdf, max_bytes=self.max_disk_bytes)
+        except OSError as e:
+            print(f"❌ Could not write PDF cache entry: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._measure_disk()
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".pdf"):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue  # removed by another worker
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _measure_disk(self):
+        try:
+            return sum(size for _, size, _ in self._disk_entries())
+        except OSError:
+            return 0
+
+    def _evict_disk(self):
+        # Other workers share the directory, so re-measure instead of trusting the running total
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except OSError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes if self.directory else 0,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,180 @@
+"""
+Background PDF rendering on a local process pool, so a large report never holds a
+web worker while it is drawn.
+
+Job state lives in a directory on local disk rather than in process memory: any
+gunicorn worker can answer a status poll or a download for a job another worker
+submitted, with no broker involved.
+
+    <job_id>.json   {"status": "pending" | "ready" | "failed", "filename", "error", ...}
+    <job_id>.pdf    the rendered report, once ready
+
+Each web worker runs its own bounded pool and refuses new jobs (QueueFull) while
+`max_pending` of its jobs are still waiting or rendering.
+"""
+import json
+import multiprocessing
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .atomic import write_atomic
+from .report import render_courses_pdf
+
+JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class PdfJobQueue:
+    def __init__(self, directory, max_workers=2, max_pending=16, ttl=900):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = None  # started on first submit, i.e. inside the serving process
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded web worker is unsafe; children only import report.py
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _submit_render(self, *args):
+        """Submit to the pool, replacing it once if a dead child (e.g. OOM-killed) broke it."""
+        executor = self._pool()
+        try:
+            return executor.submit(render_courses_pdf, *args)
+        except BrokenProcessPool:
+            print("⚠️ PDF job pool was broken, starting a new one")
+            self._drop_pool(executor)
+            return self._pool().submit(render_courses_pdf, *args)
+
+    def _drop_pool(self, executor):
+        with self._lock:
+            if self._executor is executor:  # another thread may have replaced it already
+                self._executor = None
+        executor.shutdown(wait=True, cancel_futures=True)  # already broken: returns at once
+
+    def _write_status(self, job_id, status, **fields):
+        record = {"job_id": job_id, "status": status, "updated_at": time.time(), **fields}
+        write_atomic(self._path(job_id, "json"), json.dumps(record).encode())
+
+    def submit(self, sorted_unis, total_courses, cluster_points, filename, cached_pdf=None, on_ready=None):
+        """
+        Queue a report and return its job id. `cached_pdf` (a file object with an already
+        rendered report) completes the job at once;
+        `on_ready(pdf)` runs in this process when a render finishes. Raises QueueFull.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._expire_old_jobs()
+        job_id = secrets.token_urlsafe(16)
+
+        if cached_pdf is not None:
+            write_atomic(self._path(job_id, "pdf"), cached_pdf)
+            self._write_status(job_id, "ready", filename=filename)
+            with self._lock:
+                self.submitted += 1
+            return job_id
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self._pending} PDF jobs already queued")
+            self._pending += 1
+            self.submitted += 1
+
+        try:
+            self._write_status(job_id, "pending", filename=filename)
+            future = self._submit_render(sorted_unis, total_courses, cluster_points)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            try:
+                os.unlink(self._path(job_id, "json"))  # no "pending" job left behind
+            except OSError:
+                pass  # the status was never written
+            raise
+
+        def finished(future):
+            try:
+                pdf = future.result()
+                write_atomic(self._path(job_id, "pdf"), pdf)
+                self._write_status(job_id, "ready", filename=filename)
+                if on_ready is not None:
+                    on_ready(pdf)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"❌ PDF job {job_id} failed: {e}")
+                try:
+                    self._write_status(job_id, "failed", filename=filename, error=str(e))
+                except OSError:
+                    pass
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+        future.add_done_callback(finished)
+        return job_id
+
+    def status(self, job_id):
+        """The job's status record, or None for an unknown or expired id."""
+        if not JOB_ID_RE.match(job_id or ""):
+            return None
+        try:
+            with open(self._path(job_id, "json"), "rb") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def result(self, job_id):
+        """(open pdf file, filename) of a ready job, else None. The caller closes the file."""
+        record = self.status(job_id)
+        if not record or record["status"] != "ready":
+            return None
+        try:
+            return open(self._path(job_id, "pdf"), "rb"), record.get("filename")
+        except OSError:
+            return None
+
+    def _expire_old_jobs(self):
+        cutoff = time.time() - self.ttl
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
+                    except OSError:
+                        pass  # removed by another worker
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'workers': self.max_workers,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'failed': self.failed,
+            }
@@ -3,12 +3,28 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from io import BytesIO
-from django.http import HttpResponse
+import tempfile
+
+from .report import SPOOL_MAX_MEMORY
+from .text_layout import wrap_text
+
+# Table body text, and the room left for it inside a cell (default 6pt padding each side)
+CELL_FONT, CELL_FONT_SIZE = "Helvetica", 9
+CELL_PADDING = 12
+
+
+def fit_cell(text, col_width):
+    """Pre-wrap a table cell to its column; Table breaks cell strings on newlines only."""
+    return "\n".join(wrap_text(str(text), col_width - CELL_PADDING, CELL_FONT, CELL_FONT_SIZE))
+
 
 def generate_courses_pdf(eligible_programmes, user_points, user_grades):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    """
+    Returns the report in a SpooledTemporaryFile, rewound for reading (e.g. by a
+    FileResponse); large reports spill to disk instead of being copied around in memory.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    doc = SimpleDocTemplate(output, pagesize=letter)
     styles = getSampleStyleSheet()
     
     # Custom styles
@@ -43,18 +59,19 @@ def generate_courses_pdf(eligible_programmes, user_points, user_grades):
         story.append(no_courses)
     else:
         # Create table data
+        col_widths = [2.5*inch, 2*inch, 1*inch, 1*inch]
         table_data = [['Programme', 'University', 'Required Points', 'Code']]
         
         for programme in eligible_programmes:
             table_data.append([
-                programme['programme_name'],
-                programme['university'],
+                fit_cell(programme['programme_name'], col_widths[0]),
+                fit_cell(programme['university'], col_widths[1]),
                 str(programme['required_cluster']),
                 programme['programme_code']
             ])
         
         # Create table
-        table = Table(table_data, colWidths=[2.5*inch, 2*inch, 1*inch, 1*inch])
+        table = Table(table_data, colWidths=col_widths)
         table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c5aa0')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -63,7 +80,7 @@ def generate_courses_pdf(eligible_programmes, user_points, user_grades):
             ('FONTSIZE', (0, 0), (-1, 0), 10),
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
             ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-(-1, -1), 'Helvetica'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
             ('FONTSIZE', (0, 1), (-1, -1), 9),
         ]))
         
@@ -79,8 +96,5 @@ def generate_courses_pdf(eligible_programmes, user_points, user_grades):
     
     # Build PDF
     doc.build(story)
-    
-    # Get PDF value
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
\ No newline at end of file
+    output.seek(0)
+    return output
\ No newline at end of file
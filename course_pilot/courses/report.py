@@ -0,0 +1,120 @@
+"""
+The eligible course report drawn with the ReportLab canvas. Kept free of Django so
+PDF job worker processes (pdf_jobs.py) can import it on its own.
+"""
+import io
+import tempfile
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from .text_layout import wrap_entry
+
+
+# Reports larger than this are spooled to a temporary file instead of memory
+SPOOL_MAX_MEMORY = 1 << 20
+
+
+def write_courses_pdf(output, sorted_unis, total_courses, user_cluster_points):
+    """Draw the eligible course report (a summary page, then each university's courses) into `output`."""
+    # PDF Setup
+    p = canvas.Canvas(output, pagesize=letter)
+    width, height = letter
+
+    # -------------------------
+    # PAGE 1 — SUMMARY PAGE
+    # -------------------------
+    p.setFont("Helvetica-Bold", 18)
+    p.drawString(100, 750, "Eligible Course Report")
+
+    p.setFont("Helvetica", 12)
+    p.drawString(100, 720, f"Cluster Points: {user_cluster_points}")
+    p.drawString(100, 700, f"Total Universities: {len(sorted_unis)}")
+    p.drawString(100, 680, f"Total Courses: {total_courses}")
+
+    # University list (top to bottom)
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(100, 640, "Universities You Qualify For:")
+
+    y = 620
+    p.setFont("Helvetica", 10)
+
+    for index, (uni, uni_courses) in enumerate(sorted_unis, start=1):
+        line = f"{index}. {uni}  ......  {len(uni_courses)} courses"
+
+        if y < 60:
+            p.showPage()
+            y = 750
+            p.setFont("Helvetica-Bold", 14)
+            p.drawString(100, 750, "Universities You Qualify For (continued):")
+            y -= 40
+            p.setFont("Helvetica", 10)
+
+        p.drawString(100, y, line)
+        y -= 15
+
+    p.showPage()  # Move to course list pages
+
+    # -------------------------------------
+    # PAGE 2 → Detailed pages per university
+    # -------------------------------------
+    for uni, uni_courses in sorted_unis:
+
+        # Sort courses alphabetically
+        uni_courses = sorted(uni_courses, key=lambda c: c.get("programme_name", ""))
+
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(100, 750, uni)
+
+        y = 720
+        p.setFont("Helvetica", 10)
+
+        for i, course in enumerate(uni_courses, start=1):
+
+            name = course.get("programme_name", "Unknown Programme")
+            code = course.get("programme_code", "N/A")
+            points = course.get("cluster_points", "N/A")
+
+            # Wrap long programme names; the line reads f"{i}. {name} ({code}) – {points} pts"
+            wrapped = wrap_entry(f"{i}.", str(name), f"({code}) – {points} pts", 420, "Helvetica", 10)  # fit within width
+
+            for line_index, line in enumerate(wrapped):
+                if y < 50:
+                    p.showPage()
+                    p.setFont("Helvetica-Bold", 14)
+                    p.drawString(100, 750, f"{uni} (continued)")
+                    p.setFont("Helvetica", 10)
+                    y = 720
+
+                # indent continuation line
+                if line_index > 0:
+                    p.drawString(120, y, line)   # small indent
+                else:
+                    p.drawString(100, y, line)
+
+                y -= 14
+
+            y -= 5  # small spacing after each course entry
+
+        p.showPage()
+
+    # Save PDF
+    p.save()
+
+
+def render_courses_pdf(sorted_unis, total_courses, user_cluster_points):
+    """The report as bytes, for callers that must hand it over whole (the job pool)."""
+    buffer = io.BytesIO()
+    write_courses_pdf(buffer, sorted_unis, total_courses, user_cluster_points)
+    return buffer.getvalue()
+
+
+def spool_courses_pdf(sorted_unis, total_courses, user_cluster_points, max_memory=SPOOL_MAX_MEMORY):
+    """
+    The report in a SpooledTemporaryFile, rewound for reading. Anything above `max_memory`
+    lives on disk, so serving a large report does not hold extra copies of it in memory.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    write_courses_pdf(spool, sorted_unis, total_courses, user_cluster_points)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,66 @@
+"""
+Typo-tolerant programme search over names and universities.
+
+Each programme's text is broken into trigrams the way PostgreSQL's pg_trgm does it
+(lowercased words padded as "  word "), and an inverted index maps every trigram to
+the programmes containing it. A query only touches the postings of its own trigrams,
+so noise from the PDF extraction ("BGAYCHELOR", "...TECHNOLO") still leaves most of
+a word's trigrams matching.
+"""
+import heapq
+import re
+import sys
+from array import array
+from collections import Counter, defaultdict
+
+from .catalogue import deep_sizeof
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Share of the query's trigrams a programme must contain to be returned
+MIN_SCORE = 0.3
+
+
+def trigrams(text):
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ProgrammeSearch:
+    """Trigram index over a Catalogue's programme names and universities, built once per load."""
+
+    def __init__(self, catalogue):
+        postings = defaultdict(list)
+        self.sizes = array("I")
+        for prog_id in range(len(catalogue)):
+            summary = catalogue.summary(prog_id)
+            grams = trigrams(f"{summary['programme_name']} {summary['university']}")
+            self.sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(prog_id)
+        self.postings = {gram: array("I", ids) for gram, ids in postings.items()}
+
+    def memory_bytes(self):
+        """Approximate bytes of the index, held privately by every worker."""
+        return deep_sizeof(self.postings) + sys.getsizeof(self.sizes)
+
+    def search(self, query, limit=10):
+        """[(prog_id, score)] best first; score is the share of the query's trigrams matched."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        # Ties go to the programme with less other text, i.e. the closer match
+        ranked = heapq.nsmallest(
+            limit,
+            ((-count, self.sizes[prog_id], prog_id) for prog_id, count in shared.items()
+             if count >= MIN_SCORE * len(grams)),
+        )
+        return [(prog_id, round(-negative / len(grams), 3)) for negative, _, prog_id in ranked]
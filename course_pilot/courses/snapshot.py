@@ -0,0 +1,167 @@
+"""
+Binary snapshot of a compiled Catalogue that every worker memory-maps read-only,
+so the OS page cache holds one copy of the programme data however many gunicorn
+workers are running.
+
+It is also the prebuilt artefact written by `manage.py build_catalogue`, so serving
+processes can skip parsing the CSV entirely.
+
+Layout (native byte order, every section 8-byte aligned):
+
+    header          MAGIC, schema, dataset version, SHA-256 of the body, section lengths
+    cutoffs         float64[n]      cluster points in CSV order
+    by_cutoff       uint32[n]       programme ids sorted by cutoff
+    sorted_cutoffs  float64[n]      cutoffs in by_cutoff order (for bisect)
+    req_offsets     uint32[n + 1]   programme -> slice of groups
+    group_values    int8[g]         required grade value per OR-group
+    group_offsets   uint32[g + 1]   group -> slice of group_subjects
+    group_subjects  uint16[s]       subject ids
+    subject_codes   uint32[k]       subject id -> string id
+    text_ids        uint32[3n]      (code, name, university) string ids per programme
+    signature_ids   uint32[n]       programme -> requirement signature id
+    signature_progs uint32[r]       signature id -> first programme carrying it
+    by_university   uint32[n]       programme ids in (university, name, code) order
+    by_name         uint32[n]       programme ids in (name, university, code) order
+    string_offsets  uint32[m + 1]   string id -> slice of string_data
+    string_data     utf-8 bytes     deduplicated strings
+"""
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+from .atomic import write_atomic
+from .catalogue import TEXT_FIELDS, Catalogue
+
+MAGIC = b"KCATSNAP"
+SCHEMA_VERSION = 4
+
+# magic, schema, dataset version, body checksum, n programmes, n groups,
+# n group subjects, n subject codes, n strings, string bytes, n signatures
+HEADER = struct.Struct("=8sH6x16s32sIIIIIII")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def write_snapshot(catalogue, path):
+    """Write an in-memory Catalogue's columns to `path` atomically (temp file + rename)."""
+    codes_by_id = sorted(catalogue.subject_ids, key=catalogue.subject_ids.get)
+    strings = list(catalogue._strings)
+    subject_codes = array("I", range(len(strings), len(strings) + len(codes_by_id)))
+    strings.extend(codes_by_id)
+
+    encoded = [text.encode("utf-8") for text in strings]
+    string_offsets = array("I", [0])
+    for blob in encoded:
+        string_offsets.append(string_offsets[-1] + len(blob))
+
+    sections = [
+        catalogue._cutoffs,
+        catalogue.by_cutoff,
+        catalogue.cutoffs,
+        catalogue._req_offsets,
+        catalogue._group_values,
+        catalogue._group_offsets,
+        catalogue._group_subjects,
+        subject_codes,
+        catalogue._text_ids,
+        catalogue.signature_ids,
+        catalogue.signature_programmes,
+        catalogue.by_university,
+        catalogue.by_name,
+        string_offsets,
+        b"".join(encoded),
+    ]
+
+    body = bytearray()
+    for section in sections:
+        offset = HEADER.size + len(body)
+        body += b"\0" * (_align(offset) - offset)
+        body += bytes(section)
+
+    header = HEADER.pack(
+        MAGIC, SCHEMA_VERSION, (catalogue.version or "").encode("ascii"), hashlib.sha256(body).digest(),
+        len(catalogue), len(catalogue._group_values), len(catalogue._group_subjects),
+        len(subject_codes), len(encoded), string_offsets[-1], catalogue.num_signatures,
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    write_atomic(path, (header, body), mode=0o644)
+
+
+def read_snapshot_version(path):
+    """Dataset version stored in a snapshot, or None if it is missing or not a current snapshot."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, schema, version = HEADER.unpack(raw)[:3]
+    if magic != MAGIC or schema != SCHEMA_VERSION:
+        return None
+    return version.rstrip(b"\0").decode("ascii") or None
+
+
+class SnapshotCatalogue(Catalogue):
+    """Catalogue whose columns are memoryviews over a read-only mmap of a snapshot file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+
+        (magic, schema, version, checksum, n, n_groups, n_group_subjects,
+         n_subjects, n_strings, string_bytes, n_signatures) = HEADER.unpack_from(buf)
+        if magic != MAGIC or schema != SCHEMA_VERSION:
+            raise ValueError(f"{path} is not a schema {SCHEMA_VERSION} catalogue snapshot")
+        if hashlib.sha256(buf[HEADER.size:]).digest() != checksum:
+            raise ValueError(f"{path} failed its checksum, the snapshot is corrupt")
+        self.version = version.rstrip(b"\0").decode("ascii") or None
+
+        offset = HEADER.size
+
+        def section(fmt, count):
+            nonlocal offset
+            start = _align(offset)
+            size = count * struct.calcsize(fmt)
+            offset = start + size
+            if fmt == "B":
+                return buf[start:start + size]
+            return buf[start:start + size].cast(fmt)
+
+        self._cutoffs = section("d", n)
+        self.by_cutoff = section("I", n)
+        self.cutoffs = section("d", n)
+        self._req_offsets = section("I", n + 1)
+        self._group_values = section("b", n_groups)
+        self._group_offsets = section("I", n_groups + 1)
+        self._group_subjects = section("H", n_group_subjects)
+        subject_codes = section("I", n_subjects)
+        self._text_ids = section("I", len(TEXT_FIELDS) * n)
+        self.signature_ids = section("I", n)
+        self.signature_programmes = section("I", n_signatures)
+        self.by_university = section("I", n)
+        self.by_name = section("I", n)
+        self._string_offsets = section("I", n_strings + 1)
+        self._string_data = section("B", string_bytes)
+
+        self.subject_ids = {self._string(string_id): sid for sid, string_id in enumerate(subject_codes)}
+        self._index_dominance()
+        self._index_text()
+
+    def _string(self, string_id):
+        start = self._string_offsets[string_id]
+        end = self._string_offsets[string_id + 1]
+        return str(self._string_data[start:end], "utf-8")
+
+    def memory_report(self):
+        # The mapped pages are shared by every worker mapping the file; the subject map
+        # and the indexes derived at load are built in each worker
+        return self._report(shared_bytes=len(self._mmap), private_bytes=self._index_bytes(), backing="mmap")
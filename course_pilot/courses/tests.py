@@ -1,3 +1,530 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import os
+import random
+import shutil
+import signal
+import tempfile
+import time
+import zlib
 
-# Create your tests here.
+from concurrent.futures import Future
+
+from django.test import SimpleTestCase
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from .catalogue import Catalogue
+from .cluster_calculator import MAX_SUBJECTS, ClusterCalculator, parse_slot
+from .dataset import DatasetManager, LoadedDataset
+from .numpy_engine import NumpyEligibility
+from .pdf_cache import PdfCache
+from .pdf_jobs import PdfJobQueue, QueueFull
+from .snapshot import SnapshotCatalogue, write_snapshot
+from .text_layout import wrap_entry, wrap_text
+from .views import (
+    GRADE_ORDER,
+    compile_catalogue,
+    decode_cursor,
+    encode_cursor,
+    evaluate_eligibility,
+    evaluate_eligibility_batch,
+    grade_improvements,
+    load_all_programmes,
+    meets_group_requirement,
+    parse_cluster_points,
+    parse_requirement_cell,
+    student_grade_values,
+    student_grades_to_code_map,
+)
+
+# A slice of the cluster CSV covering its requirement shapes: OR-groups, codes split
+# over lines, aliases (HAG), MAT A / MAT B, repeated groups, no requirements, missing
+# 2024 / 2023 cutoffs, and two rows sharing a requirement signature
+FIXTURE_CSV = '''0,1,2,3,4,5,6,7,8,9
+1,1087107,KISII UNIVERSITY,BACHELOR OF ACTUARIAL SCIENCE,18.831,19.914,MAT A(121):C+,,,
+2,1176115,LAIKIPIA UNIVERSITY,BACHELOR OF SCIENCE (COMPUTER SCIENCE,26.766,25.264,MAT A(121):C+,PHY(232):C+,"ENG(101)/KIS(10
+2):C",
+3,1057120,EGERTON UNIVERSITY,BACHELOR OF SCIENCE,15.683,16.974,MAT A(121):C,"BIO(231)/CHE(23
+3)/PHY(232):C","BIO(231)/CHE(23
+3)/PHY(232):C",
+4,1057122,EGERTON UNIVERSITY,BACHELOR OF SCIENCE (AGRICULTURE),15.864,23.701,"BIO(231)/AGR(4
+43):C+",CHE(233):C,"MAT
+A(121)/PHY(232)
+/GEO(312):C",
+5,1229132,MASENO UNIVERSITY,"BACHELOR OF SCIENCE (NURSING, WITH IT)",42.529,42.357,BIO(231):C+,CHE(233):C+,"MAT
+A(121)/PHY(232)
+:C+","ENG(101)/KIS(10
+2):C+"
+6,1057133,EGERTON UNIVERSITY,BACHELOR OF COMMERCE,30.01,26.655,"MAT
+A(121)/MAT
+B(122):C",,,
+7,1105136,CHUKA UNIVERSITY,BACHELOR OF ARTS (CRIMINOLOGY & SECURITY STUDIES),26.631,30.721,,,,
+8,1057137,EGERTON UNIVERSITY,BACHELOR OF EDUCATION (SCIENCE),35.289,35.282,"BIO(231)/PHY(23
+2)/CHE(233)/MA
+T A(121):C+","BIO(231)/PHY(23
+2)/CHE(233)/MA
+T A(121):C+",,
+9,1079146,KIRINYAGA UNIVERSITY,BACHELOR OF ECONOMICS,18.831,19.914,MAT A(121):C+,"ENG(101)/KIS(10
+2):C",,
+10,1063181,TECHNICAL UNIVERSITY OF MOMBASA,BACHELOR OF JOURNALISM & MASS COMMUNICATION,29.885,32.201,"ENG(101)/KIS(10
+2):C+",,,
+11,1111213,KENYATTA UNIVERSITY,BACHELOR OF ENVIRONMENTAL SCIENCE,-,27.664,"BIO(231)/AGR(4
+43):C+","CHE(233)/GEO(3
+12):C+",,
+12,1600232,ALUPE UNIVERSITY,BACHELOR OF INFORMATION TECHNOLOGY,-,-,MAT A(121):C,"ENG(101)/KIS(10
+2):C",,
+13,1073292,RONGO UNIVERSITY,BACHELOR OF ARTS (GEOGRAPHY),18.144,24.656,GEO(312):C+,,,
+14,1117446,PWANI UNIVERSITY,BACHELOR OF ARTS IN THEOLOGY,20.93,19.67,"CRE(313)/IRE(31
+4)/HRE(315):C+","ENG(101)/KIS(10
+2):C",,
+15,1515135,TOM MBOYA UNIVERSITY,"BACHELOR OF EDUCATION (ARTS, WITH IT)",27.837,25.8,"HAG(311)/GEO(
+312)/CRE(313):C+",MAT B(122):C,,
+16,1079423,KIRINYAGA UNIVERSITY,BACHELOR OF SCIENCE (COMMUNITY HEALTH & DEVELOPMENT),15.864,17.043,BIO(231):C,CHE(233):C,"MAT
+A(121)/PHY(232)
+:C","ENG(101)/KIS(10
+2):C"
+17,1103107,KCA UNIVERSITY,BACHELOR OF ACTUARIAL SCIENCE,18.831,19.914,MAT A(121):C+,,,
+'''
+
+SUBJECTS = [
+    "Mathematics", "English", "Kiswahili", "Biology", "Chemistry", "Physics",
+    "Geography", "History", "CRE", "Agriculture", "Business Studies", "Home Science",
+]
+
+
+def baseline_eligibility(csv_text, cluster_points, grades):
+    """The original check_eligibility loop: (eligible row positions, filtered out)."""
+    code_grade_map = student_grades_to_code_map(grades)
+    eligible = []
+    filtered_out = 0
+    rows = [row for row in csv.reader(io.StringIO(csv_text))][1:]
+    for position, row in enumerate(row for row in rows if len(row) >= 6):
+        cp2024 = parse_cluster_points(row[4].strip())
+        cp2023 = parse_cluster_points(row[5].strip())
+        prog_cp = cp2024 if cp2024 is not None else cp2023 if cp2023 is not None else 0.0
+        if cluster_points < prog_cp:
+            continue
+
+        groups = []
+        for cell in row[6:10]:
+            if cell and cell.strip() and cell.strip() not in ("-", "NA", "N/A"):
+                groups.extend(parse_requirement_cell(cell.strip()))
+
+        if all(meets_group_requirement(codes, grade, code_grade_map) for codes, grade in groups):
+            eligible.append(position)
+        else:
+            filtered_out += 1
+    return eligible, filtered_out
+
+
+def random_profiles(count, seed=7):
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        subjects = rng.sample(SUBJECTS, rng.randint(2, 9))
+        grades = {name: rng.choice(GRADE_ORDER[:8]) for name in subjects}  # A .. C-, around the C / C+ minimums
+        profiles.append((round(rng.uniform(10, 46), 3), grades))
+    return profiles
+
+
+class EligibilityEngineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.csv_path = os.path.join(cls.tmpdir, "programmes.csv")
+        with open(cls.csv_path, "w", encoding="utf-8", newline="") as f:
+            f.write(FIXTURE_CSV)
+        cls.catalogue = compile_catalogue(cls.csv_path)
+        cls.profiles = random_profiles(300)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+        super().tearDownClass()
+
+    def grade_values(self, catalogue, grades):
+        return student_grade_values(student_grades_to_code_map(grades), catalogue)
+
+    def assertMatchesBaseline(self, dataset):
+        for cluster_points, grades in self.profiles:
+            with self.subTest(cluster_points=cluster_points, grades=grades):
+                result = evaluate_eligibility(dataset, cluster_points, self.grade_values(dataset.catalogue, grades))
+                self.assertEqual(result, baseline_eligibility(FIXTURE_CSV, cluster_points, grades))
+
+    def test_fixture_loaded(self):
+        self.assertEqual(len(self.catalogue), 17)
+        self.assertLess(self.catalogue.num_signatures, len(self.catalogue))
+
+    def test_python_engine_matches_baseline(self):
+        self.assertMatchesBaseline(LoadedDataset(self.catalogue))
+
+    def test_numpy_engine_matches_baseline(self):
+        self.assertMatchesBaseline(LoadedDataset(self.catalogue, NumpyEligibility(self.catalogue)))
+
+    def test_batch_matches_single_evaluation(self):
+        for engine in (None, NumpyEligibility(self.catalogue)):
+            dataset = LoadedDataset(self.catalogue, engine)
+            profiles = [(cp, self.grade_values(self.catalogue, grades)) for cp, grades in self.profiles]
+            self.assertEqual(
+                evaluate_eligibility_batch(dataset, profiles),
+                [evaluate_eligibility(dataset, cp, grade_values) for cp, grade_values in profiles],
+            )
+
+
+    def test_grade_improvements_match_reevaluation(self):
+        for cluster_points, grades in self.profiles:
+            eligible_now, improvements = grade_improvements(self.catalogue, cluster_points, grades)
+            eligible, _ = baseline_eligibility(FIXTURE_CSV, cluster_points, grades)
+            self.assertEqual(eligible_now, len(eligible))
+            for name, grade, improved, extra in improvements:
+                with self.subTest(cluster_points=cluster_points, grades=grades, subject=name):
+                    self.assertEqual(grade, grades[name])
+                    self.assertEqual(GRADE_ORDER.index(improved), GRADE_ORDER.index(grade) - 1)
+                    raised, _ = baseline_eligibility(FIXTURE_CSV, cluster_points, {**grades, name: improved})
+                    self.assertEqual(eligible_now + extra, len(raised))
+
+    def test_snapshot_round_trip(self):
+        path = os.path.join(self.tmpdir, "catalogue.bin")
+        write_snapshot(self.catalogue, path)
+        snapshot = SnapshotCatalogue(path)
+
+        self.assertEqual(snapshot.version, self.catalogue.version)
+        self.assertEqual(snapshot.subject_ids, self.catalogue.subject_ids)
+        self.assertEqual(
+            [snapshot.summary(i) for i in range(len(snapshot))],
+            [self.catalogue.summary(i) for i in range(len(self.catalogue))],
+        )
+        self.assertMatchesBaseline(LoadedDataset(snapshot))
+
+    def test_corrupt_snapshot_is_rejected(self):
+        path = os.path.join(self.tmpdir, "corrupt.bin")
+        write_snapshot(self.catalogue, path)
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+        with self.assertRaisesRegex(ValueError, "checksum"):
+            SnapshotCatalogue(path)
+
+class BatchEndpointTests(SimpleTestCase):
+    def test_rejects_entries_that_are_not_objects(self):
+        response = self.client.post(
+            "/api/check-eligibility/batch/", {"students": ["x"]}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Each student must be an object"})
+
+
+class DatasetManagerTests(SimpleTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.write("v1")
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def write(self, version):
+        with open(self.path, "w") as f:
+            f.write(version)
+
+    def build(self):
+        with open(self.path) as f:
+            return LoadedDataset(Catalogue([], version=f.read()))
+
+    def test_swaps_in_a_new_version_when_the_files_change(self):
+        manager = DatasetManager(self.build, lambda: [self.path], check_interval=0.01)
+        self.assertEqual(manager.current().version, "v1")
+
+        self.write("v2 (longer, so the size changes too)")
+        time.sleep(0.02)
+        deadline = time.monotonic() + 5
+        while manager.current().version == "v1" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(manager.current().version, "v2 (longer, so the size changes too)")
+        self.assertEqual(manager.reloads, 1)
+
+    def test_keeps_the_previous_version_when_a_build_fails(self):
+        builds = [self.build]
+        manager = DatasetManager(lambda: builds[-1](), lambda: [self.path], check_interval=0)
+        first = manager.current()
+
+        def broken():
+            raise ValueError("bad CSV")
+        builds.append(broken)
+        self.assertIs(manager.reload(), first)
+        self.assertIs(manager.current(), first)
+        self.assertEqual(manager.last_error, "ValueError: bad CSV")
+        self.assertEqual(manager.reloads, 0)
+
+
+class ClusterCalculatorTests(SimpleTestCase):
+    ALIASES = {"HAG": "HIS", "CMP": "CS"}
+
+    def canonical(self, code):
+        return self.ALIASES.get(code, code)
+
+    def test_parse_slot(self):
+        cases = {
+            "MAT ALTERNATIVE A/B or any GROUP II": {"MAT", "BIO", "PHY", "CHE", "GSC"},
+            "Subject 2 ENG - C+": {"ENG"},
+            "any GROUP 3": {"HIS", "GEO", "CRE", "IRE", "HRE"},
+            "AGRIC/COMP/HAG": {"AGR", "CS", "HIS"},
+            "BIO or GEO – B (PLAIN)": {"BIO", "GEO"},
+        }
+        for text, codes in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_slot(text, self.canonical), codes)
+
+    def test_scores_follow_the_kuccps_formula(self):
+        sciences = frozenset({"BIO", "CHE", "PHY"})
+        calculator = ClusterCalculator({
+            "1": [frozenset({"MAT"}), frozenset({"ENG", "KIS"}), sciences, sciences],
+            "2": [frozenset({"FRE"}), frozenset({"ENG"}), sciences, sciences],
+        })
+        subjects = [
+            (("MAT",), 12), (("ENG",), 9), (("KIS",), 10), (("BIO",), 6),
+            (("CHE",), 8), (("PHY",), 7), (("GEO",), 11), (("XYZ",), 12),
+        ]
+        scores, aggregate = calculator.scores(subjects)
+
+        # Best seven of the eight, the unknown subject included
+        self.assertEqual(aggregate, 12 + 12 + 11 + 10 + 9 + 8 + 7)
+        # MAT, then KIS over ENG, then the two best sciences
+        r = 12 + 10 + 8 + 7
+        self.assertEqual(scores["1"], round(48 * math.sqrt((r / 48) * (aggregate / 84)), 3))
+        self.assertIsNone(scores["2"])  # no French
+
+    def test_too_many_subjects(self):
+        calculator = ClusterCalculator({"1": [frozenset({"MAT"})] * 4})
+        subjects = [((f"S{i:02d}",), 12) for i in range(MAX_SUBJECTS + 1)]
+        with self.assertRaises(ValueError):
+            calculator.scores(subjects)
+
+        grades = {f"{chr(65 + i)}{chr(65 + i)}x subject": "A" for i in range(MAX_SUBJECTS + 1)}
+        response = self.client.post("/api/cluster-points/", {"grades": grades}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class PaginationTests(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor("abc123", "-cutoff", 50)
+        self.assertEqual(decode_cursor(cursor, "abc123", "-cutoff"), 50)
+
+    def test_cursor_from_another_version_or_sort_is_rejected(self):
+        cursor = encode_cursor("abc123", "-cutoff", 50)
+        for version, sort in (("def456", "-cutoff"), ("abc123", "cutoff")):
+            with self.subTest(version=version, sort=sort), self.assertRaisesRegex(ValueError, "expired"):
+                decode_cursor(cursor, version, sort)
+        with self.assertRaisesRegex(ValueError, "Invalid"):
+            decode_cursor("not a cursor", "abc123", "-cutoff")
+
+    def test_pages_add_up_to_the_full_listing(self):
+        body = {"grades": {"Mathematics": "A", "English": "A", "Biology": "A", "Chemistry": "A"},
+                "cluster_points": 40, "sort": "name", "compact": "ids"}
+        full = self.client.post("/api/check-eligibility/", body, content_type="application/json").json()
+
+        paged, cursor = [], None
+        while True:
+            page = self.client.post(
+                "/api/check-eligibility/", {**body, "limit": 100, **({"cursor": cursor} if cursor else {})},
+                content_type="application/json",
+            ).json()
+            paged.extend(page["eligible_ids"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        self.assertGreater(len(full["eligible_ids"]), 100)
+        self.assertEqual(paged, full["eligible_ids"])
+
+
+class CompactListingTests(SimpleTestCase):
+    body = {"grades": {"Mathematics": "A", "English": "A"}, "cluster_points": 40}
+
+    def post(self, **extra):
+        return self.client.post("/api/check-eligibility/", {**self.body, **extra}, content_type="application/json")
+
+    def test_falsy_compact_means_full_objects(self):
+        for compact in (False, "", None):
+            with self.subTest(compact=compact):
+                response = self.post(compact=compact)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("eligible_programmes", response.json())
+
+    def test_unknown_compact_mode_is_rejected(self):
+        self.assertEqual(self.post(compact="rows").status_code, 400)
+
+
+class CatalogueCachingTests(SimpleTestCase):
+    def test_gzipped_catalogue_revalidates_with_its_weak_etag(self):
+        first = self.client.get("/api/catalogue/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertTrue(first["ETag"].startswith('W/"'))
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        again = self.client.get("/api/catalogue/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+    def test_gzipped_ndjson_is_flushed_line_by_line(self):
+        response = self.client.post(
+            "/api/check-eligibility/",
+            {"grades": {"Mathematics": "A", "English": "A"}, "cluster_points": 40, "stream": "ndjson"},
+            content_type="application/json", HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = iter(response.streaming_content)
+        first = decompressor.decompress(next(chunks))
+        self.assertTrue(first.endswith(b"\n"))
+        self.assertIn("total_found", json.loads(first))
+        rest = b"".join(decompressor.decompress(chunk) for chunk in chunks)
+        self.assertEqual(len(rest.splitlines()), json.loads(first)["total_found"])
+
+
+class PdfCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def read(self, cache, key):
+        f = cache.open(key)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = PdfCache(max_memory_bytes=250, directory="", max_entry_memory_bytes=100)
+        cache.put("a", b"a" * 100)
+        cache.put("b", b"b" * 100)
+        self.read(cache, "a")  # a is now more recent than b
+        cache.put("c", b"c" * 100)
+
+        self.assertIsNone(self.read(cache, "b"))
+        self.assertEqual(self.read(cache, "a"), b"a" * 100)
+        self.assertEqual(self.read(cache, "c"), b"c" * 100)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache._memory_bytes, 250)
+
+    def test_disk_tier_evicts_least_recently_used(self):
+        cache = PdfCache(max_memory_bytes=0, directory=self.directory, max_disk_bytes=250)
+        cache.put("a", b"a" * 100)
+        time.sleep(0.01)
+        cache.put("b", b"b" * 100)
+        time.sleep(0.01)
+        self.read(cache, "a")  # touches a's mtime
+        time.sleep(0.01)
+        cache.put("c", b"c" * 100)
+
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "b.pdf")))
+        self.assertIsNone(self.read(cache, "b"))
+        self.assertEqual(self.read(cache, "a"), b"a" * 100)
+        self.assertEqual(self.read(cache, "c"), b"c" * 100)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_large_reports_stay_on_disk_and_oversized_ones_are_skipped(self):
+        cache = PdfCache(max_memory_bytes=1000, directory=self.directory, max_disk_bytes=250,
+                         max_entry_memory_bytes=50)
+        report = io.BytesIO(b"r" * 100)
+        cache.put_file("large", report)
+        self.assertEqual(report.tell(), 0)
+        self.assertNotIn("large", cache._memory)
+        self.assertEqual(self.read(cache, "large"), b"r" * 100)
+
+        cache.put("huge", b"h" * 300)
+        self.assertIsNone(self.read(cache, "huge"))
+        self.assertEqual(sorted(os.listdir(self.directory)), ["large.pdf"])
+
+
+class PdfJobQueueTests(SimpleTestCase):
+    UNIS = [("UNIVERSITY OF NAIROBI", [{"programme_code": "1263101", "programme_name": "BACHELOR OF LAWS", "cluster_points": 40.0}])]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def wait_for(self, queue, job_id, timeout=60):
+        deadline = time.time() + timeout
+        while queue.status(job_id)["status"] == "pending" and time.time() < deadline:
+            time.sleep(0.05)
+        return queue.status(job_id)["status"]
+
+    def test_full_queue_rejects_until_a_job_finishes(self):
+        queue = PdfJobQueue(self.directory, max_pending=1)
+        render = Future()
+        queue._submit_render = lambda *args: render  # a render that is still running
+
+        job_id = queue.submit(self.UNIS, 1, 40, "a.pdf")
+        with self.assertRaises(QueueFull):
+            queue.submit(self.UNIS, 1, 40, "b.pdf")
+        self.assertEqual(queue.stats()["rejected"], 1)
+        self.assertEqual(queue.status(job_id)["status"], "pending")
+
+        render.set_result(b"%PDF-1.4")
+        self.assertEqual(queue.status(job_id)["status"], "ready")
+        self.assertEqual(queue.stats()["pending"], 0)
+        queue._submit_render = lambda *args: Future()
+        queue.submit(self.UNIS, 1, 40, "c.pdf")
+
+    def test_killed_worker_pool_is_replaced(self):
+        queue = PdfJobQueue(self.directory, max_workers=1)
+        self.addCleanup(lambda: queue._executor and queue._executor.shutdown(wait=True, cancel_futures=True))
+        self.assertEqual(self.wait_for(queue, queue.submit(self.UNIS, 1, 40, "a.pdf")), "ready")
+
+        broken = queue._executor
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)  # e.g. the OOM killer
+        deadline = time.time() + 10
+        while not broken._broken and time.time() < deadline:
+            time.sleep(0.05)
+
+        job_id = queue.submit(self.UNIS, 1, 40, "b.pdf")
+        self.assertEqual(self.wait_for(queue, job_id), "ready")
+        self.assertIsNot(queue._executor, broken)
+        with queue.result(job_id)[0] as f:
+            self.assertTrue(f.read().startswith(b"%PDF"))
+
+
+def string_width_wrap(text, max_width, font_name="Helvetica", font_size=10):
+    """The report's original wrapping: re-measure the growing line with stringWidth for every word."""
+    words = text.split()
+    lines = []
+    current = words[0]
+    for word in words[1:]:
+        if stringWidth(current + " " + word, font_name, font_size) < max_width:
+            current += " " + word
+        else:
+            lines.append(current)
+            current = word
+    lines.append(current)
+    return tuple(lines)
+
+
+class TextLayoutTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.programmes = load_all_programmes()
+
+    def test_wrap_entry_matches_string_width_wrapping(self):
+        for i, prog in enumerate(self.programmes, 1):
+            prefix, suffix = f"{i}.", f"({prog.programme_code}) – {prog.cluster_points} pts"
+            for max_width in (120, 420):
+                self.assertEqual(
+                    wrap_entry(prefix, prog.programme_name, suffix, max_width, "Helvetica", 10),
+                    string_width_wrap(f"{prefix} {prog.programme_name} {suffix}", max_width),
+                )
+
+    def test_wrap_text_matches_string_width_wrapping(self):
+        for prog in self.programmes:
+            for text in (prog.programme_name, prog.university):
+                for max_width in (60, 132):
+                    self.assertEqual(
+                        wrap_text(text, max_width, "Helvetica", 9),
+                        string_width_wrap(text, max_width, "Helvetica", 9),
+                    )
@@ -0,0 +1,89 @@
+"""
+Line wrapping for the PDF reports without re-measuring text.
+
+ReportLab's stringWidth walks the whole string every call, so wrapping by measuring
+"current line + next word" is quadratic per line. Here each glyph width of a font is
+looked up once, each recurring name is measured once (programme names recur across
+universities), and a line is broken in one pass over its word widths. Results match
+stringWidth exactly: the standard fonts have no kerning, so a string's width is the
+sum of its glyph widths (in 1/1000 em) scaled by the font size.
+"""
+from functools import lru_cache
+
+from reportlab.pdfbase import pdfmetrics
+
+
+@lru_cache(maxsize=None)
+def glyph_widths(font_name):
+    """Advance widths in 1/1000 em, precomputed for printable Latin-1 and filled in lazily beyond."""
+    return {chr(code): round(pdfmetrics.stringWidth(chr(code), font_name, 1000)) for code in range(32, 256)}
+
+
+def glyph_width(char, font_name):
+    widths = glyph_widths(font_name)
+    width = widths.get(char)
+    if width is None:
+        width = widths[char] = round(pdfmetrics.stringWidth(char, font_name, 1000))
+    return width
+
+
+def units(text, font_name):
+    """Width in 1/1000 em; times font_size / 1000 it equals pdfmetrics.stringWidth."""
+    return sum(glyph_width(char, font_name) for char in text)
+
+
+@lru_cache(maxsize=16384)
+def word_units(word, font_name):
+    return units(word, font_name)
+
+
+@lru_cache(maxsize=4096)
+def measure_words(text, font_name):
+    """(words, their widths in 1/1000 em); memoized, since programme and university names recur."""
+    words = tuple(text.split())
+    return words, tuple(word_units(word, font_name) for word in words)
+
+
+def break_lines(words, widths, max_width, font_name, font_size):
+    """
+    Split words into lines narrower than max_width points, in one pass over their widths
+    (a single word wider than the line gets a line of its own). Returns a tuple of lines.
+    """
+    if not words:
+        return ()
+
+    space = glyph_width(" ", font_name)
+    lines = []
+    start = 0
+    width = widths[0]
+    for i in range(1, len(words)):
+        if (width + space + widths[i]) * 0.001 * font_size < max_width:
+            width += space + widths[i]
+        else:
+            lines.append(" ".join(words[start:i]))
+            start = i
+            width = widths[i]
+    lines.append(" ".join(words[start:]))
+    return tuple(lines)
+
+
+@lru_cache(maxsize=4096)
+def wrap_text(text, max_width, font_name="Helvetica", font_size=10):
+    """Wrap a recurring string, such as a table cell; the whole layout is memoized."""
+    return break_lines(*measure_words(text, font_name), max_width, font_name, font_size)
+
+
+def wrap_entry(prefix, text, suffix, max_width, font_name="Helvetica", font_size=10):
+    """
+    Wrap f"{prefix} {text} {suffix}" where only `text` recurs (a numbered programme line):
+    the text's measurement is reused, the one-off prefix and suffix are measured directly.
+    """
+    text_words, text_widths = measure_words(text, font_name)
+    prefix_words, suffix_words = prefix.split(), suffix.split()
+    words = (*prefix_words, *text_words, *suffix_words)
+    widths = (
+        *(units(word, font_name) for word in prefix_words),
+        *text_widths,
+        *(units(word, font_name) for word in suffix_words),
+    )
+    return break_lines(words, widths, max_width, font_name, font_size)
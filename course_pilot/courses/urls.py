@@ -3,7 +3,19 @@ from . import views
 
 urlpatterns = [
     path('check-eligibility/', views.check_eligibility, name='check_eligibility'),
+    path('check-eligibility/batch/', views.check_eligibility_batch, name='check_eligibility_batch'),
+    path('near-misses/', views.near_misses, name='near_misses'),
+    path('what-if/', views.what_if, name='what_if'),
+    path('cluster-points/', views.calculate_cluster_points, name='cluster_points'),
+    path('catalogue/', views.programme_catalogue, name='programme_catalogue'),
+    path('programmes/lookup/', views.lookup_programmes, name='lookup_programmes'),
+    path('programmes/<str:code>/', views.programme_detail, name='programme_detail'),
+    path('search/', views.search_programmes, name='search_programmes'),
     path('check-database/', views.check_database, name='check_database'),
+    path('reload-dataset/', views.reload_dataset, name='reload_dataset'),
     path('pay/', views.pay, name='pay'),
     path('download-pdf/', views.download_courses_pdf, name='download_courses_pdf'),
+    path('pdf-jobs/', views.submit_pdf_job, name='submit_pdf_job'),
+    path('pdf-jobs/<str:job_id>/', views.pdf_job_status, name='pdf_job_status'),
+    path('pdf-jobs/<str:job_id>/download/', views.download_pdf_job, name='download_pdf_job'),
 ]
@@ -1,13 +1,29 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+import base64
 import csv
+import json
 import os
-import io
+from collections import Counter, defaultdict
 import re
+import hashlib
+import hmac
+import heapq
+import secrets
+import time
+import zlib
 from datetime import datetime
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
+
+from .catalogue import SORT_KEYS, Catalogue, ProgrammeRecord, file_digest
+from .dataset import DatasetManager, LoadedDataset
+from .pdf_cache import PdfCache, report_key
+from .pdf_jobs import PdfJobQueue, QueueFull
+from .report import spool_courses_pdf
+from .result_cache import ResultCache
+from .search import ProgrammeSearch
+from .snapshot import SnapshotCatalogue, read_snapshot_version, write_snapshot
 
 # ------------------------
 # CONFIG / GRADE SCALE
@@ -70,19 +86,41 @@ CODE_PREFIX_RE = re.compile(r'\b([A-Z]{2,4})\b')
 # ------------------------
 # CSV LOADER
 # ------------------------
-def load_all_programmes():
-    programmes = []
-    possible_paths = [
-        "data/cleaned/KUCCPS_ClusterPoints_Cleaned.csv",
-        "/opt/render/project/src/data/cleaned/KUCCPS_ClusterPoints_Cleaned.csv",
-        "KUCCPS_ClusterPoints_Cleaned.csv"
-    ]
+PROGRAMMES_CSV_PATHS = [
+    "data/cleaned/KUCCPS_ClusterPoints_Cleaned.csv",
+    "/opt/render/project/src/data/cleaned/KUCCPS_ClusterPoints_Cleaned.csv",
+    "KUCCPS_ClusterPoints_Cleaned.csv"
+]
+
+REQUIREMENTS_CSV_PATHS = [
+    "data/cleaned/KUCCPS_Requirements_Cleaned.csv",
+    "/opt/render/project/src/data/cleaned/KUCCPS_Requirements_Cleaned.csv",
+    "KUCCPS_Requirements_Cleaned.csv"
+]
+
+def find_programmes_csv():
+    for p in PROGRAMMES_CSV_PATHS:
+        if os.path.exists(p):
+            return p
+    return None
 
-    csv_file = None
-    for p in possible_paths:
+def find_requirements_csv():
+    for p in REQUIREMENTS_CSV_PATHS:
         if os.path.exists(p):
-            csv_file = p
-            break
+            return p
+    return None
+
+def parse_cluster_points(value: str):
+    try:
+        if value not in ("", "-", "NA", "N/A", None):
+            return float(value.replace(",", "."))
+    except ValueError:
+        pass
+    return None
+
+def load_all_programmes(csv_file=None):
+    programmes = []
+    csv_file = csv_file or find_programmes_csv()
 
     if not csv_file:
         print("❌ CSV file not found in any known location.")
@@ -106,16 +144,8 @@ def load_all_programmes():
                     cp2024_raw = row[4].strip() if len(row) > 4 else ""
                     cp2023_raw = row[5].strip() if len(row) > 5 else ""
 
-                    def parse_cp(value):
-                        try:
-                            if value not in ("", "-", "NA", "N/A", None):
-                                return float(value.replace(",", "."))
-                        except:
-                            pass
-                        return None
-
-                    cp2024 = parse_cp(cp2024_raw)
-                    cp2023 = parse_cp(cp2023_raw)
+                    cp2024 = parse_cluster_points(cp2024_raw)
+                    cp2023 = parse_cluster_points(cp2023_raw)
 
                     if cp2024 is not None:
                         cluster_points = cp2024
@@ -133,13 +163,13 @@ def load_all_programmes():
                             if cell and cell.strip() and cell.strip() not in ("-", "NA", "N/A"):
                                 subj_reqs.append(cell.strip())
 
-                    programmes.append({
-                        "programme_code": programme_code,
-                        "programme_name": programme_name,
-                        "university": university,
-                        "cluster_points": cluster_points,
-                        "requirements": subj_reqs
-                    })
+                    programmes.append(ProgrammeRecord(
+                        programme_code,
+                        programme_name,
+                        university,
+                        cluster_points,
+                        compile_requirements(subj_reqs)
+                    ))
 
                 except Exception:
                     # removed "Skipping row due to parse error"
@@ -152,8 +182,6 @@ def load_all_programmes():
         print(f"❌ Error reading CSV: {e}")
         return []
 
-ALL_PROGRAMMES = load_all_programmes()
-
 # ------------------------
 # HELPERS
 # ------------------------
@@ -234,13 +262,524 @@ def meets_group_requirement(codes: list, required_grade: str, student_code_grade
                 return True
     return False
 
+# ------------------------
+# COMPILED REQUIREMENTS
+# ------------------------
+# Canonical subject code -> small integer id, assigned while the CSV is compiled
+SUBJECT_IDS = {}
+
+def subject_id(code: str):
+    return SUBJECT_IDS.setdefault(code, len(SUBJECT_IDS))
+
+def compile_requirements(cells: list):
+    """
+    Parse requirement cells once at load time.
+    Returns a tuple of (subject_ids, required_value) OR-groups, all of which must be met.
+    """
+    groups = []
+    for cell in cells:
+        for codes, req_grade in parse_requirement_cell(cell):
+            groups.append((tuple(subject_id(c) for c in codes), GRADE_VALUE.get(req_grade, 0)))
+    return tuple(groups)
+
+def student_grade_values(student_code_grade_map: dict, catalogue):
+    """Map the student's grades onto the catalogue's subject ids -> numeric grade values."""
+    values = {}
+    for code, grade in student_code_grade_map.items():
+        sid = catalogue.subject_ids.get(code)
+        if sid is not None and grade:
+            values[sid] = GRADE_VALUE.get(grade, 0)
+    return values
+
+def meets_compiled_requirements(groups: tuple, grade_values: dict):
+    for subject_ids, required_value in groups:
+        for sid in subject_ids:
+            if grade_values.get(sid, -1) >= required_value:
+                break
+        else:
+            return False
+    return True
+
+class SignatureVerdicts:
+    """
+    One student's pass/fail per requirement signature, worked out on first use.
+    Each check also settles the signatures it dominates (on a pass) or that dominate it
+    (on a fail), so those are never checked; `pruned` counts the verdicts inferred that way.
+    """
+
+    def __init__(self, catalogue, grade_values: dict):
+        self.catalogue = catalogue
+        self.grade_values = grade_values
+        self.verdicts = [None] * catalogue.num_signatures
+        self.inferred = [False] * catalogue.num_signatures
+        self.evaluated = 0
+        self.pruned = 0
+
+    def meets(self, signature_id):
+        meets = self.verdicts[signature_id]
+        if meets is not None:
+            if self.inferred[signature_id]:
+                self.inferred[signature_id] = False  # count each inferred verdict once
+                self.pruned += 1
+            return meets
+
+        catalogue = self.catalogue
+        meets = meets_compiled_requirements(catalogue.signature_requirements(signature_id), self.grade_values)
+        self.verdicts[signature_id] = meets
+        self.evaluated += 1
+        for implied in (catalogue.weaker if meets else catalogue.stronger)[signature_id]:
+            if self.verdicts[implied] is None:
+                self.verdicts[implied] = meets
+                self.inferred[implied] = True
+        return meets
+
+    def report(self):
+        return {'evaluated': self.evaluated, 'pruned': self.pruned}
+
+def evaluate_eligibility(dataset, cluster_points: float, grade_values: dict, verdicts=None):
+    """
+    Returns (eligible programme ids in CSV order, programmes failing only on subjects).
+    Pass a SignatureVerdicts to read back how many requirement checks ran and were pruned.
+    """
+    if dataset.engine is not None:
+        return dataset.engine.evaluate(cluster_points, grade_values)
+
+    catalogue = dataset.catalogue
+    signature_ids = catalogue.signature_ids
+    eligible_ids = []
+    filtered_out = 0
+    if verdicts is None:
+        verdicts = SignatureVerdicts(catalogue, grade_values)
+
+    # Only programmes whose cutoff the student reaches are ever visited
+    for prog_id in catalogue.within_cutoff(cluster_points):
+        if verdicts.meets(signature_ids[prog_id]):
+            eligible_ids.append(prog_id)
+        else:
+            filtered_out += 1
+
+    # Keep the response in CSV order
+    eligible_ids.sort()
+    return eligible_ids, filtered_out
+
+def evaluate_eligibility_batch(dataset, profiles: list, verdicts=None):
+    """
+    Evaluate many (cluster_points, grade_values) profiles in one pass over the catalogue.
+    Returns one (eligible ids, filtered_out) pair per profile, same as evaluate_eligibility.
+    `verdicts` optionally holds one SignatureVerdicts per profile.
+    """
+    if dataset.engine is not None:
+        return [dataset.engine.evaluate(cp, grade_values) for cp, grade_values in profiles]
+
+    catalogue = dataset.catalogue
+
+    # Walking programmes lowest cutoff first, the students still reaching them shrink
+    # to a prefix of `order` (most programmes reached first)
+    reach = [catalogue.reachable_count(cp) for cp, _ in profiles]
+    order = sorted(range(len(profiles)), key=lambda i: reach[i], reverse=True)
+    active = len(order)
+    eligible = [[] for _ in profiles]
+    filtered = [0] * len(profiles)
+    if verdicts is None:
+        verdicts = [SignatureVerdicts(catalogue, grade_values) for _, grade_values in profiles]
+    signature_ids = catalogue.signature_ids
+
+    for position, prog_id in enumerate(catalogue.by_cutoff):
+        while active and reach[order[active - 1]] <= position:
+            active -= 1
+        if not active:
+            break
+
+        signature_id = signature_ids[prog_id]
+        for k in range(active):
+            student = order[k]
+            if verdicts[student].meets(signature_id):
+                eligible[student].append(prog_id)
+            else:
+                filtered[student] += 1
+
+    for ids in eligible:
+        ids.sort()
+    return list(zip(eligible, filtered))
+
+def eligibility_cache_key(catalogue, cluster_points: float, grade_values: dict):
+    """
+    Canonical student profile: the number of cutoffs the points reach plus the compiled
+    grade values, so e.g. 38.1204 and 38.1199 share an entry whenever no cutoff lies
+    between them. The dataset version retires entries built from an older CSV.
+    """
+    return (
+        catalogue.version,
+        catalogue.reachable_count(cluster_points),
+        tuple(sorted(grade_values.items())),
+    )
+
+def cached_eligibility(dataset, cluster_points: float, grade_values: dict, verdicts=None):
+    """evaluate_eligibility through RESULT_CACHE. Returns (result, whether it came from the cache)."""
+    key = eligibility_cache_key(dataset.catalogue, cluster_points, grade_values)
+    result = RESULT_CACHE.get(key)
+    if result is not None:
+        return result, True
+    result = evaluate_eligibility(dataset, cluster_points, grade_values, verdicts)
+    RESULT_CACHE.put(key, result)
+    return result, False
+
+def requirement_checks(dataset, verdicts: list, cached: int = 0):
+    """
+    The requirement_checks field: signature checks run and pruned by `verdicts`, and how
+    many results came from the cache instead. The NumPy engine checks every signature
+    at once, so it reports only its name.
+    """
+    report = {'engine': 'numpy'} if dataset.engine is not None else {
+        'evaluated': sum(v.evaluated for v in verdicts),
+        'pruned': sum(v.pruned for v in verdicts),
+    }
+    if cached:
+        report['cached'] = cached
+    return report
+
+def compile_catalogue(csv_file: str):
+    """Parse and compile the cluster CSV into an in-memory Catalogue."""
+    return Catalogue(load_all_programmes(csv_file), version=file_digest(csv_file), subject_ids=SUBJECT_IDS)
+
+def load_catalogue():
+    """
+    Map the prebuilt snapshot (manage.py build_catalogue) when it is valid and matches the
+    CSV; a snapshot shipped without the CSV is used as-is. Otherwise compile the CSV and
+    (re)write the snapshot, falling back to an in-memory Catalogue if no snapshot path is
+    configured or the snapshot cannot be written.
+    """
+    csv_file = find_programmes_csv()
+    version = file_digest(csv_file) if csv_file else None
+    snapshot_path = getattr(settings, 'CATALOGUE_SNAPSHOT_PATH', '')
+
+    if snapshot_path:
+        snapshot_version = read_snapshot_version(snapshot_path)
+        if snapshot_version and version in (None, snapshot_version):
+            try:
+                catalogue = SnapshotCatalogue(snapshot_path)
+                print(f"✅ Mapped {len(catalogue)} programmes from snapshot: {snapshot_path}")
+                return catalogue
+            except ValueError as e:
+                print(f"❌ {e}")
+        elif snapshot_version:
+            print(f"⚠️ Catalogue snapshot {snapshot_path} does not match the CSV, rebuilding")
+
+    if not csv_file:
+        print("❌ CSV file not found in any known location.")
+        return Catalogue([])
+
+    catalogue = compile_catalogue(csv_file)
+    if snapshot_path and len(catalogue):
+        try:
+            write_snapshot(catalogue, snapshot_path)
+            return SnapshotCatalogue(snapshot_path)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not use catalogue snapshot {snapshot_path}: {e}")
+    return catalogue
+
+def load_cluster_calculator():
+    requirements_csv = find_requirements_csv()
+    if not requirements_csv:
+        print("❌ Cluster requirements CSV not found, cluster points cannot be calculated.")
+        return None
+
+    from .cluster_calculator import ClusterCalculator, load_cluster_definitions  # numpy
+    definitions = load_cluster_definitions(requirements_csv, canonical=lambda code: ALIAS_TO_CODE.get(code, code))
+    print(f"✅ Loaded {len(definitions)} cluster definitions from CSV: {requirements_csv}")
+    return ClusterCalculator(definitions, version=file_digest(requirements_csv))
+
+def report_duplicate_codes(catalogue):
+    duplicates = catalogue.duplicate_codes()
+    if duplicates:
+        listed = ', '.join(f"{code} ({rows} rows)" for code, rows in list(duplicates.items())[:10])
+        print(f"⚠️ {len(duplicates)} programme codes appear on more than one row: {listed}")
+
+def build_dataset():
+    started = time.perf_counter()
+    catalogue = load_catalogue()
+    report_duplicate_codes(catalogue)
+    engine = None
+    # settings.ELIGIBILITY_ENGINE: "python" (default) or "numpy"
+    if getattr(settings, 'ELIGIBILITY_ENGINE', 'python') == 'numpy':
+        from .numpy_engine import NumpyEligibility  # keeps numpy off the import path
+        engine = NumpyEligibility(catalogue)
+    return LoadedDataset(
+        catalogue,
+        engine,
+        source='snapshot' if isinstance(catalogue, SnapshotCatalogue) else 'csv',
+        load_seconds=time.perf_counter() - started,
+        load_calculator=load_cluster_calculator,  # on the first cluster request
+        search=ProgrammeSearch(catalogue),
+    )
+
+def dataset_files():
+    """Files whose change triggers a reload: both CSVs and the prebuilt snapshot."""
+    paths = (find_programmes_csv(), find_requirements_csv(), getattr(settings, 'CATALOGUE_SNAPSHOT_PATH', ''))
+    return [p for p in paths if p]
+
+DATASET = DatasetManager(
+    build_dataset,
+    dataset_files,
+    check_interval=getattr(settings, 'DATASET_CHECK_INTERVAL', 30),
+)
+
+RESULT_CACHE = ResultCache(
+    max_entries=getattr(settings, 'ELIGIBILITY_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'ELIGIBILITY_CACHE_TTL', 600),
+)
+CLUSTER_SCORE_CACHE = ResultCache(
+    max_entries=getattr(settings, 'ELIGIBILITY_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'ELIGIBILITY_CACHE_TTL', 600),
+)
+PDF_CACHE = PdfCache(
+    max_memory_bytes=getattr(settings, 'PDF_CACHE_MEMORY_BYTES', 32 << 20),
+    directory=getattr(settings, 'PDF_CACHE_DIR', ''),
+    max_disk_bytes=getattr(settings, 'PDF_CACHE_DISK_BYTES', 512 << 20),
+)
+PDF_JOBS = PdfJobQueue(
+    getattr(settings, 'PDF_JOB_DIR', os.path.join('data', 'cache', 'pdf-jobs')),
+    max_workers=getattr(settings, 'PDF_JOB_WORKERS', 2),
+    max_pending=getattr(settings, 'PDF_JOB_MAX_PENDING', 16),
+    ttl=getattr(settings, 'PDF_JOB_TTL', 900),
+)
+# result_id -> StoredResult, so the PDF endpoint need not receive the whole list back
+RESULT_STORE = ResultCache(
+    max_entries=getattr(settings, 'ELIGIBILITY_RESULT_STORE_SIZE', 1000),
+    ttl=getattr(settings, 'ELIGIBILITY_RESULT_TTL', 900),
+)
+
+class StoredResult:
+    """
+    One check_eligibility result kept for the PDF endpoint. It holds the catalogue it was
+    computed against, so a reload in between cannot change what the ids refer to.
+    """
+
+    def __init__(self, catalogue, prog_ids, cluster_points):
+        self.catalogue = catalogue
+        self.prog_ids = prog_ids
+        self.cluster_points = cluster_points
+        self._by_university = None
+
+    def by_university(self):
+        """[(university, [programme summaries])], most programmes first, built on first use."""
+        if self._by_university is None:
+            selected = bytearray(len(self.catalogue))
+            for prog_id in self.prog_ids:
+                selected[prog_id] = 1
+            grouped = {}
+            for prog_id in self.catalogue.sort_order('university'):
+                if selected[prog_id]:
+                    summary = self.catalogue.summary(prog_id)
+                    grouped.setdefault(summary['university'], []).append(summary)
+            self._by_university = sorted(grouped.items(), key=lambda x: len(x[1]), reverse=True)
+        return self._by_university
+
+def store_result(catalogue, prog_ids, cluster_points):
+    """Keep a result for RESULT_STORE's TTL; returns its id, or None if the store is disabled."""
+    if RESULT_STORE.max_entries <= 0:
+        return None
+    result_id = secrets.token_urlsafe(16)
+    RESULT_STORE.put(result_id, StoredResult(catalogue, prog_ids, cluster_points))
+    return result_id
+
+# ------------------------
+# CLUSTER POINT CALCULATOR
+# ------------------------
+def student_subjects(student_grades: dict):
+    """
+    One (codes, grade points) entry per subject the student sat, for the cluster calculator.
+    Unlike student_grades_to_code_map, a name mapping to several codes (e.g. "religious
+    education" -> CRE/IRE) stays one subject, so it can only fill one cluster slot.
+    """
+    subjects = {}
+    for name, grade in (student_grades or {}).items():
+        if not name or not grade:
+            continue
+        points = GRADE_VALUE.get(str(grade).strip().upper())
+        if points is None:
+            continue
+        key = normalize_subject_name(name)
+        codes = NAME_TO_CODE.get(key) or [re.sub(r'[^A-Za-z]', '', key)[:3].upper()]
+        codes = tuple(sorted({ALIAS_TO_CODE.get(code, code) for code in codes}))
+        subjects[codes] = max(points, subjects.get(codes, 0))
+    return sorted(subjects.items())
+
+def cluster_scores(dataset, student_grades: dict):
+    """
+    ({cluster: weighted points or None}, aggregate points), cached per canonical profile.
+    Raises ValueError for more subjects than a KCSE candidate sits.
+    """
+    subjects = student_subjects(student_grades)
+    key = (dataset.calculator.version, tuple(subjects))
+    result = CLUSTER_SCORE_CACHE.get(key)
+    if result is None:
+        result = dataset.calculator.scores(subjects)
+        CLUSTER_SCORE_CACHE.put(key, result)
+    return result
+
+def resolve_cluster_points(dataset, data: dict):
+    """
+    The request's cluster points: as sent, or, when only a "cluster" (e.g. "13" or "13A")
+    is given, the score calculated for that cluster from the student's grades.
+    Returns (cluster_points, calculated); raises ValueError if they cannot be worked out.
+    """
+    if data.get('cluster_points') not in (None, '') or not data.get('cluster'):
+        return float(data.get('cluster_points', 0)), False
+
+    if dataset.calculator is None:
+        raise ValueError('Cluster points calculator is not available')
+    # Sub-clusters (13A, 13B, ...) share their parent cluster's subjects
+    cluster = re.sub(r'[^0-9]', '', str(data.get('cluster')))
+    scores, _ = cluster_scores(dataset, data.get('grades', {}))
+    if cluster not in scores:
+        raise ValueError(f"Unknown cluster: {data.get('cluster')}")
+    if scores[cluster] is None:
+        raise ValueError(f"Grades do not cover the subjects of cluster {cluster}")
+    return scores[cluster], True
+
+@api_view(['POST'])
+def calculate_cluster_points(request):
+    """Body: {"grades": {"Mathematics": "B+", ...}} -> weighted points for every cluster."""
+    try:
+        dataset = DATASET.current()
+        if dataset.calculator is None:
+            return Response({'error': 'Cluster points calculator is not available'}, status=500)
+
+        try:
+            scores, aggregate = cluster_scores(dataset, (request.data or {}).get('grades', {}))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        available = {cluster: points for cluster, points in scores.items() if points is not None}
+        return Response({
+            'cluster_scores': scores,
+            'aggregate_points': aggregate,
+            'best_cluster': max(available, key=available.get) if available else None,
+            'message': f'Calculated {len(available)} of {len(scores)} clusters'
+        })
+
+    except Exception as e:
+        print(f"Cluster points error: {e}")
+        return Response({'error': str(e)}, status=500)
+
+# ------------------------
+# SORTING / PAGINATION / NDJSON
+# ------------------------
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(version, sort: str, offset: int):
+    return base64.urlsafe_b64encode(f"{version}|{sort}|{offset}".encode()).decode()
+
+def decode_cursor(cursor: str, version, sort: str):
+    """Offset stored in a cursor; ValueError if it is malformed or from another dataset or sort."""
+    try:
+        cursor_version, cursor_sort, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        offset = int(offset)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+    if cursor_version != str(version) or cursor_sort != sort or offset < 0:
+        raise ValueError('Cursor expired: the programme data or sort changed, start again without a cursor')
+    return offset
+
+def listing_options(data: dict, catalogue):
+    """(sort, start offset, page size or None, compact mode or None), ValueError on bad input."""
+    sort = str(data.get('sort') or 'csv')
+    if sort.lstrip('-') not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)} (prefix - for descending)")
+
+    limit = data.get('limit')
+    if limit is not None:
+        limit = int(limit)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    cursor = data.get('cursor')
+    start = decode_cursor(str(cursor), catalogue.version, sort) if cursor else 0
+
+    compact = data.get('compact') or None  # false / "" / null: full programme objects
+    if compact is not None and compact not in COMPACT_MODES:
+        raise ValueError(f"compact must be one of {', '.join(COMPACT_MODES)}")
+    return sort, start, limit, compact
+
+def sorted_eligible(catalogue, eligible_ids: list, sort: str):
+    """Eligible ids (CSV order) in the requested order, filtered from the precomputed sort order."""
+    key = sort.lstrip('-')
+    if key == 'csv':
+        ordered = eligible_ids
+    else:
+        eligible = bytearray(len(catalogue))
+        for prog_id in eligible_ids:
+            eligible[prog_id] = 1
+        ordered = [prog_id for prog_id in catalogue.sort_order(key) if eligible[prog_id]]
+    return ordered[::-1] if sort.startswith('-') else ordered
+
+COMPACT_MODES = ('ids', 'codes')
+
+def programme_filters(params, catalogue):
+    """
+    Filters from a request body or query string: university (one or a list), keyword,
+    min_cutoff, max_cutoff. Returns (university ids or None, ids matching the other
+    filters or None); None means that filter was not given. ValueError on bad input.
+    """
+    universities = params.getlist('university') if hasattr(params, 'getlist') else params.get('university')
+    if isinstance(universities, str):
+        universities = [universities]
+    university_ids = catalogue.university_ids(universities) if universities else None
+
+    other_ids = None
+    keyword = params.get('keyword')
+    if keyword:
+        other_ids = catalogue.keyword_ids(str(keyword))
+
+    low, high = params.get('min_cutoff'), params.get('max_cutoff')
+    if low not in (None, '') or high not in (None, ''):
+        low = float(low) if low not in (None, '') else None
+        high = float(high) if high not in (None, '') else None
+        in_range = set(catalogue.cutoff_range_ids(low, high))
+        other_ids = in_range if other_ids is None else other_ids & in_range
+
+    return university_ids, other_ids
+
+def university_facets(catalogue, prog_ids):
+    """{university: programme count}, largest first, for the filter sidebar."""
+    counts = Counter(catalogue.university(prog_id) for prog_id in prog_ids)
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+def ndjson_response(request, meta: dict, programmes):
+    """
+    Meta line first, then one programme per line, serialized as the client reads.
+    Gzip is applied here with a flush after every line: GZipMiddleware would buffer the
+    stream and deliver it in one piece at the end (it skips responses already encoded).
+    """
+    def lines():
+        yield (json.dumps(meta) + '\n').encode()
+        for programme in programmes:
+            yield (json.dumps(programme) + '\n').encode()
+
+    def gzipped(chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+    if not re.search(r'\bgzip\b', request.headers.get('Accept-Encoding', '')):
+        response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+    else:
+        response = StreamingHttpResponse(gzipped(lines()), content_type='application/x-ndjson')
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
 # ------------------------
 # MAIN ELIGIBILITY ENDPOINT
 # ------------------------
 @api_view(['POST'])
 def check_eligibility(request):
     try:
-        if not ALL_PROGRAMMES:
+        # One dataset version for the whole request, even if a reload swaps it meanwhile
+        dataset = DATASET.current()
+        catalogue = dataset.catalogue
+        if not catalogue:
             return Response({
                 'eligible_programmes': [],
                 'total_found': 0,
@@ -248,76 +787,560 @@ def check_eligibility(request):
             }, status=500)
 
         data = request.data or {}
-        user_cluster_points = float(data.get('cluster_points', 0))
+        try:
+            user_cluster_points, calculated = resolve_cluster_points(dataset, data)
+            sort, start, limit, compact = listing_options(data, catalogue)
+            university_ids, other_ids = programme_filters(data, catalogue)
+        except ValueError as e:
+            return Response({
+                'eligible_programmes': [],
+                'total_found': 0,
+                'message': f'Error: {str(e)}'
+            }, status=400)
         user_grades = data.get('grades', {})
 
         student_code_grade_map = student_grades_to_code_map(user_grades)
-        eligible_programmes = []
-        filtered_out = 0
+        grade_values = student_grade_values(student_code_grade_map, catalogue)
+        verdicts = SignatureVerdicts(catalogue, grade_values)
+        (eligible_ids, filtered_out), cached = cached_eligibility(dataset, user_cluster_points, grade_values, verdicts)
+
+        # Filters ({"university": [...], "keyword": "...", "min_cutoff"/"max_cutoff"}); the
+        # university facet counts ignore the university filter itself, as sidebars expect
+        faceted = other_ids is not None or university_ids is not None or data.get('facets')
+        if other_ids is not None:
+            eligible_ids = [prog_id for prog_id in eligible_ids if prog_id in other_ids]
+        facets = university_facets(catalogue, eligible_ids) if faceted else None
+        if university_ids is not None:
+            eligible_ids = [prog_id for prog_id in eligible_ids if prog_id in university_ids]
+
+        # Optional sort order and page ({"sort": "-cutoff", "limit": 50, "cursor": ...})
+        ordered = sorted_eligible(catalogue, eligible_ids, sort)
+        end = len(ordered) if limit is None else start + limit
+        page = ordered[start:end]
+        if compact == 'ids':
+            # Positions in GET /api/catalogue/ for this catalogue_version
+            eligible_programmes = iter(page)
+        elif compact == 'codes':
+            eligible_programmes = (catalogue.programme_code(prog_id) for prog_id in page)
+        else:
+            eligible_programmes = (
+                {**catalogue.summary(prog_id), 'meets_subjects': True}
+                for prog_id in page
+            )
+
+        response = {
+            'total_found': len(ordered),
+            'database_total': len(catalogue),
+            'programmes_filtered': filtered_out,
+            'requirement_checks': {'cached': True} if cached else requirement_checks(dataset, [verdicts]),
+            'message': f'Found {len(ordered)} programmes matching criteria (cluster + subjects)'
+        }
+        if calculated:
+            response['cluster_points'] = user_cluster_points
+        if limit is not None:
+            response['next_cursor'] = encode_cursor(catalogue.version, sort, end) if end < len(ordered) else None
+        if compact:
+            response['catalogue_version'] = catalogue.version
+        if facets is not None:
+            response['facets'] = {'university': facets}
+        # {"store_result": true}: download-pdf can then take {"result_id": ...} instead of the list
+        if data.get('store_result'):
+            response['result_id'] = store_result(catalogue, ordered, user_cluster_points)
+            response['result_expires_in'] = RESULT_STORE.ttl
+
+        # {"stream": "ndjson"} (or ?stream=ndjson): the meta line, then one programme per line
+        if data.get('stream', request.query_params.get('stream')) == 'ndjson':
+            return ndjson_response(request, response, eligible_programmes)
+        listing_key = {'ids': 'eligible_ids', 'codes': 'eligible_codes'}.get(compact, 'eligible_programmes')
+        return Response({listing_key: list(eligible_programmes), **response})
 
-        for prog in ALL_PROGRAMMES:
-            prog_cp = prog.get('cluster_points', 0)
-            if user_cluster_points < prog_cp:
-                continue
+    except Exception as e:
+        print(f"Eligibility error: {e}")
+        return Response({
+            'eligible_programmes': [],
+            'total_found': 0,
+            'message': f'Error: {str(e)}'
+        }, status=500)
 
-            requirements_cells = prog.get('requirements', [])
-            groups = []
-            for cell in requirements_cells:
-                parsed = parse_requirement_cell(cell)
-                if parsed:
-                    groups.extend(parsed)
-
-            if not groups:
-                eligible_programmes.append({
-                    'programme_code': prog.get('programme_code'),
-                    'programme_name': prog.get('programme_name'),
-                    'university': prog.get('university'),
-                    'cluster_points': prog.get('cluster_points'),
-                    'meets_subjects': True
-                })
+# ------------------------
+# NEAR MISSES
+# ------------------------
+MAX_NEAR_MISSES = 50
+
+def grade_for_value(value: int):
+    return GRADE_ORDER[len(GRADE_ORDER) - value] if 1 <= value <= len(GRADE_ORDER) else None
+
+def near_misses_on_points(catalogue, cluster_points: float, verdicts, k: int, margin: float):
+    """
+    Programmes whose subjects the student meets but whose cutoff is above their points
+    by at most `margin`, smallest shortfall first. The cutoff index is already sorted,
+    so this walks forward from the student's position and stops after k hits.
+    """
+    misses = []
+    for position in range(catalogue.reachable_count(cluster_points), len(catalogue)):
+        shortfall = catalogue.cutoffs[position] - cluster_points
+        if len(misses) == k or not shortfall <= margin:
+            break
+        prog_id = catalogue.by_cutoff[position]
+        if verdicts.meets(catalogue.signature_ids[prog_id]):
+            misses.append({**catalogue.summary(prog_id), 'shortfall': round(shortfall, 3)})
+    return misses
+
+def single_subject_block(groups, grade_values: dict):
+    """The only OR-group a student fails as (subject_ids, required, best), or None if it is not exactly one."""
+    failed = None
+    for subject_ids, required_value in groups:
+        best = max((grade_values.get(sid, -1) for sid in subject_ids), default=-1)
+        if best < required_value:
+            if failed is not None:
+                return None
+            failed = (subject_ids, required_value, best)
+    return failed
+
+def near_misses_on_subjects(catalogue, cluster_points: float, grade_values: dict, verdicts, k: int):
+    """
+    Programmes the student's points reach that fail on exactly one subject group, fewest
+    grade steps short first (subjects not taken at all rank last). Kept to k with a bounded
+    heap over the reachable programmes instead of sorting them all.
+    """
+    blocks = {}  # signature id -> single failing group or None, worked out once per signature
+
+    def candidates():
+        for prog_id in catalogue.within_cutoff(cluster_points):
+            signature_id = catalogue.signature_ids[prog_id]
+            if verdicts.meets(signature_id):
                 continue
+            if signature_id not in blocks:
+                blocks[signature_id] = single_subject_block(
+                    catalogue.signature_requirements(signature_id), grade_values
+                )
+            block = blocks[signature_id]
+            if block is not None:
+                _, required_value, best = block
+                yield (best < 0, required_value - max(best, 0), prog_id, block)
+
+    codes = {sid: code for code, sid in catalogue.subject_ids.items()}
+    misses = []
+    for not_taken, _, prog_id, (subject_ids, required_value, best) in heapq.nsmallest(k, candidates()):
+        misses.append({
+            **catalogue.summary(prog_id),
+            'blocking_subjects': sorted(codes.get(sid, str(sid)) for sid in subject_ids),
+            'required_grade': grade_for_value(required_value),
+            'student_grade': None if not_taken else grade_for_value(best),
+            'grade_steps_short': None if not_taken else required_value - best,
+        })
+    return misses
 
-            all_groups_met = True
-            for codes, req_grade in groups:
-                if not meets_group_requirement(codes, req_grade, student_code_grade_map):
-                    all_groups_met = False
-                    break
+@api_view(['POST'])
+def near_misses(request):
+    """
+    Body: {"cluster_points" | "cluster", "grades": {...}, "k": 10, "margin": 2.0}
+    What the student almost qualified for: programmes missed by at most `margin` cluster
+    points, and programmes within their points blocked by a single subject grade.
+    """
+    try:
+        dataset = DATASET.current()
+        catalogue = dataset.catalogue
+        if not catalogue:
+            return Response({'error': 'System error: programmes not loaded'}, status=500)
 
-            if all_groups_met:
-                eligible_programmes.append({
-                    'programme_code': prog.get('programme_code'),
-                    'programme_name': prog.get('programme_name'),
-                    'university': prog.get('university'),
-                    'cluster_points': prog.get('cluster_points'),
-                    'meets_subjects': True
-                })
-            else:
-                filtered_out += 1
+        data = request.data or {}
+        try:
+            cluster_points, _ = resolve_cluster_points(dataset, data)
+            k = int(data.get('k', 10))
+            margin = float(data.get('margin', 2.0))
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=400)
+        if not 1 <= k <= MAX_NEAR_MISSES:
+            return Response({'error': f'k must be between 1 and {MAX_NEAR_MISSES}'}, status=400)
+        if not margin >= 0:
+            return Response({'error': 'margin must be zero or more'}, status=400)
+
+        grade_values = student_grade_values(student_grades_to_code_map(data.get('grades', {})), catalogue)
+        verdicts = SignatureVerdicts(catalogue, grade_values)
+        on_points = near_misses_on_points(catalogue, cluster_points, verdicts, k, margin)
+        on_subjects = near_misses_on_subjects(catalogue, cluster_points, grade_values, verdicts, k)
 
         return Response({
-            'eligible_programmes': eligible_programmes,
-            'total_found': len(eligible_programmes),
-            'database_total': len(ALL_PROGRAMMES),
-            'programmes_filtered': filtered_out,
-            'message': f'Found {len(eligible_programmes)} programmes matching criteria (cluster + subjects)'
+            'cluster_points': cluster_points,
+            'margin': margin,
+            'missed_on_points': on_points,
+            'missed_on_one_subject': on_subjects,
+            'requirement_checks': verdicts.report(),
+            'message': f'{len(on_points)} programmes within {margin} points, {len(on_subjects)} blocked by one subject'
         })
 
     except Exception as e:
-        print(f"Eligibility error: {e}")
+        print(f"Near miss error: {e}")
+        return Response({'error': str(e)}, status=500)
+
+# ------------------------
+# WHAT-IF GRADE IMPROVEMENTS
+# ------------------------
+def grade_improvements(catalogue, cluster_points: float, student_grades: dict):
+    """
+    For each subject the student sent, how many more programmes they would qualify for if
+    that grade rose one step on GRADE_ORDER, with cluster points held fixed.
+
+    One pass records, per reachable requirement signature, the OR-groups the student fails
+    and indexes them by subject. Raising a subject can only open signatures whose failing
+    groups mention it, so each what-if re-checks just those groups.
+    Returns (programmes eligible now, [(subject, grade, improved grade, extra programmes)]).
+    """
+    grade_values = student_grade_values(student_grades_to_code_map(student_grades), catalogue)
+    reachable = Counter(catalogue.signature_ids[prog_id] for prog_id in catalogue.within_cutoff(cluster_points))
+
+    failing = {}                    # signature id -> OR-groups the student fails
+    depends_on = defaultdict(set)   # subject id -> failing signatures with a group mentioning it
+    for signature_id in reachable:
+        groups = [
+            (subject_ids, required_value)
+            for subject_ids, required_value in catalogue.signature_requirements(signature_id)
+            if not meets_compiled_requirements(((subject_ids, required_value),), grade_values)
+        ]
+        if groups:
+            failing[signature_id] = groups
+            for subject_ids, _ in groups:
+                for sid in subject_ids:
+                    depends_on[sid].add(signature_id)
+
+    eligible_now = sum(count for signature_id, count in reachable.items() if signature_id not in failing)
+
+    improvements = []
+    for name, grade in (student_grades or {}).items():
+        grade = str(grade or '').strip().upper()
+        if not name or grade not in GRADE_VALUE or grade == GRADE_ORDER[0]:
+            continue
+        improved = GRADE_ORDER[GRADE_ORDER.index(grade) - 1]
+        improved_values = student_grade_values(
+            student_grades_to_code_map({**student_grades, name: improved}), catalogue
+        )
+        changed = [sid for sid, value in improved_values.items() if value != grade_values.get(sid, -1)]
+        opened = set().union(*(depends_on[sid] for sid in changed))
+        extra = sum(
+            reachable[signature_id] for signature_id in opened
+            if meets_compiled_requirements(failing[signature_id], improved_values)
+        )
+        improvements.append((name, grade, improved, extra))
+
+    return eligible_now, improvements
+
+@api_view(['POST'])
+def what_if(request):
+    """Body: {"cluster_points" | "cluster", "grades": {...}} -> extra programmes per one-step grade rise."""
+    try:
+        dataset = DATASET.current()
+        catalogue = dataset.catalogue
+        if not catalogue:
+            return Response({'error': 'System error: programmes not loaded'}, status=500)
+
+        data = request.data or {}
+        try:
+            cluster_points, _ = resolve_cluster_points(dataset, data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        eligible_now, improvements = grade_improvements(catalogue, cluster_points, data.get('grades') or {})
+        improvements.sort(key=lambda item: -item[3])
         return Response({
-            'eligible_programmes': [],
-            'total_found': 0,
+            'cluster_points': cluster_points,
+            'total_found': eligible_now,
+            'improvements': [
+                {
+                    'subject': name,
+                    'current_grade': grade,
+                    'improved_grade': improved,
+                    'extra_programmes': extra,
+                    'total_if_improved': eligible_now + extra,
+                }
+                for name, grade, improved, extra in improvements
+            ],
+            'message': f'Checked a one-grade rise in {len(improvements)} subjects'
+        })
+
+    except Exception as e:
+        print(f"What-if error: {e}")
+        return Response({'error': str(e)}, status=500)
+
+# ------------------------
+# BATCH ELIGIBILITY (whole classes)
+# ------------------------
+MAX_BATCH_STUDENTS = 500
+
+@api_view(['POST'])
+def check_eligibility_batch(request):
+    """
+    Body: {"students": [{"id": ..., "cluster_points": ..., "grades": {...}}, ...]}
+    A student may send "cluster" instead of "cluster_points", as in check_eligibility.
+    Every eligible programme is listed once in "programmes"; each student's
+    "eligible" list holds positions in that shared list.
+    """
+    try:
+        dataset = DATASET.current()
+        catalogue = dataset.catalogue
+        if not catalogue:
+            return Response({
+                'programmes': [],
+                'results': [],
+                'message': 'System error: programmes not loaded'
+            }, status=500)
+
+        students = (request.data or {}).get('students')
+        if not isinstance(students, list) or not students:
+            return Response({'error': 'students must be a non-empty list'}, status=400)
+        if len(students) > MAX_BATCH_STUDENTS:
+            return Response({'error': f'At most {MAX_BATCH_STUDENTS} students per batch'}, status=400)
+        if not all(isinstance(student, dict) for student in students):
+            return Response({'error': 'Each student must be an object'}, status=400)
+
+        profiles = []
+        calculated_points = []
+        for index, student in enumerate(students):
+            try:
+                cluster_points, calculated = resolve_cluster_points(dataset, student)
+            except ValueError as e:
+                return Response({'error': f"Student {student.get('id', index)}: {e}"}, status=400)
+            calculated_points.append(cluster_points if calculated else None)
+            grade_values = student_grade_values(student_grades_to_code_map(student.get('grades', {})), catalogue)
+            profiles.append((cluster_points, grade_values))
+
+        # Only profiles missing from the cache go through the catalogue pass
+        keys = [eligibility_cache_key(catalogue, cp, grade_values) for cp, grade_values in profiles]
+        outcomes = [RESULT_CACHE.get(key) for key in keys]
+        misses = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        verdicts = [SignatureVerdicts(catalogue, profiles[i][1]) for i in misses]
+        for i, outcome in zip(misses, evaluate_eligibility_batch(dataset, [profiles[i] for i in misses], verdicts)):
+            outcomes[i] = outcome
+            RESULT_CACHE.put(keys[i], outcome)
+
+        shared_ids = sorted({prog_id for eligible_ids, _ in outcomes for prog_id in eligible_ids})
+        position = {prog_id: i for i, prog_id in enumerate(shared_ids)}
+
+        results = []
+        for index, (student, (eligible_ids, filtered_out)) in enumerate(zip(students, outcomes)):
+            result = {
+                'id': student.get('id', index),
+                'eligible': [position[prog_id] for prog_id in eligible_ids],
+                'total_found': len(eligible_ids),
+                'programmes_filtered': filtered_out,
+            }
+            if calculated_points[index] is not None:
+                result['cluster_points'] = calculated_points[index]
+            results.append(result)
+
+        return Response({
+            'programmes': [catalogue.summary(prog_id) for prog_id in shared_ids],
+            'results': results,
+            'database_total': len(catalogue),
+            'requirement_checks': requirement_checks(dataset, verdicts, cached=len(students) - len(misses)),
+            'message': f'Checked {len(results)} students against {len(catalogue)} programmes'
+        })
+
+    except Exception as e:
+        print(f"Batch eligibility error: {e}")
+        return Response({
+            'programmes': [],
+            'results': [],
             'message': f'Error: {str(e)}'
         }, status=500)
 
+# ------------------------
+# CATALOGUE (cacheable programme metadata)
+# ------------------------
+CATALOGUE_FIELDS = ('programme_code', 'programme_name', 'university', 'cluster_points')
+# Part of the catalogue ETag: bump when CATALOGUE_FIELDS or the body layout changes, so
+# clients holding the old shape get the new body instead of a 304
+CATALOGUE_FORMAT = 1
+_catalogue_body = (None, b'')  # (dataset version, serialized JSON), rebuilt once per version
+
+def catalogue_rows(catalogue, prog_ids):
+    return [
+        [summary[field] for field in CATALOGUE_FIELDS]
+        for summary in map(catalogue.summary, prog_ids)
+    ]
+
+def catalogue_body(catalogue):
+    global _catalogue_body
+    version, body = _catalogue_body
+    if version != catalogue.version or not body:
+        body = json.dumps({
+            'version': catalogue.version,
+            'fields': CATALOGUE_FIELDS,
+            # Row i is programme id i, as returned by check_eligibility with "compact": "ids"
+            'programmes': catalogue_rows(catalogue, range(len(catalogue))),
+        }, separators=(',', ':')).encode()
+        _catalogue_body = (catalogue.version, body)
+    return body
+
+def filtered_catalogue_body(catalogue, university_ids, other_ids):
+    prog_ids = range(len(catalogue))
+    if other_ids is not None:
+        prog_ids = sorted(other_ids)
+    facets = university_facets(catalogue, prog_ids)
+    if university_ids is not None:
+        prog_ids = [prog_id for prog_id in prog_ids if prog_id in university_ids]
+    return json.dumps({
+        'version': catalogue.version,
+        'fields': CATALOGUE_FIELDS,
+        'ids': list(prog_ids),
+        'programmes': catalogue_rows(catalogue, prog_ids),
+        'facets': {'university': facets},
+    }, separators=(',', ':')).encode()
+
+def etag_matches(etag: str, if_none_match: str):
+    """
+    Weak comparison, as If-None-Match calls for: GZipMiddleware sends our strong ETags
+    back as W/"...", so that is what browsers revalidate with.
+    """
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in [tag.removeprefix('W/') for tag in tags]
+
+@api_view(['GET'])
+def programme_catalogue(request):
+    """
+    Every programme as compact rows, with a strong ETag from the format and dataset hash.
+    Sent with no-cache: row positions are the ids of "compact": "ids" and change when the
+    dataset reloads, so browsers and the CDN revalidate every time (a cheap 304) instead
+    of serving a stale copy.
+    Takes the check_eligibility filters as query parameters (?university=...&keyword=...),
+    in which case "ids" gives each row's programme id and "facets" the university counts.
+    """
+    catalogue = DATASET.current().catalogue
+    try:
+        university_ids, other_ids = programme_filters(request.query_params, catalogue)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    filtered = university_ids is not None or other_ids is not None
+
+    etag_key = f"{CATALOGUE_FORMAT}-{catalogue.version}"
+    if filtered:
+        query = sorted(request.query_params.lists())
+        etag_key = f"{etag_key}-{hashlib.sha256(repr(query).encode()).hexdigest()[:12]}"
+    etag = f'"{etag_key}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, no-cache',
+    }
+
+    if catalogue.version and etag_matches(etag, request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=304)
+    elif filtered:
+        response = HttpResponse(filtered_catalogue_body(catalogue, university_ids, other_ids), content_type='application/json')
+    else:
+        response = HttpResponse(catalogue_body(catalogue), content_type='application/json')
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+# ------------------------
+# PROGRAMME LOOKUP BY CODE
+# ------------------------
+MAX_LOOKUP_CODES = 500
+
+def programme_rows(catalogue, code):
+    return [{'id': prog_id, **catalogue.summary(prog_id)} for prog_id in catalogue.programme_ids(code)]
+
+@api_view(['GET'])
+def programme_detail(request, code):
+    """All rows for one programme code (more than one only if the CSV repeats it)."""
+    rows = programme_rows(DATASET.current().catalogue, code)
+    if not rows:
+        return Response({'error': f'Programme {code} not found'}, status=404)
+    return Response({'programme_code': code, 'programmes': rows})
+
+@api_view(['POST'])
+def lookup_programmes(request):
+    """Body: {"codes": ["1087107", ...]} -> rows per code, e.g. for bookmarked programmes."""
+    codes = (request.data or {}).get('codes')
+    if not isinstance(codes, list) or not codes:
+        return Response({'error': 'codes must be a non-empty list'}, status=400)
+    if len(codes) > MAX_LOOKUP_CODES:
+        return Response({'error': f'At most {MAX_LOOKUP_CODES} codes per lookup'}, status=400)
+
+    catalogue = DATASET.current().catalogue
+    found = {}
+    not_found = []
+    for code in dict.fromkeys(str(code).strip() for code in codes):
+        rows = programme_rows(catalogue, code)
+        if rows:
+            found[code] = rows
+        else:
+            not_found.append(code)
+    return Response({'programmes': found, 'not_found': not_found})
+
+# ------------------------
+# PROGRAMME SEARCH (autocomplete)
+# ------------------------
+MAX_SEARCH_RESULTS = 50
+
+@api_view(['GET'])
+def search_programmes(request):
+    """?q=...&limit=10 -> programmes ranked by trigram similarity of name and university."""
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({'error': 'limit must be a number'}, status=400)
+    if not query:
+        return Response({'error': 'q is required'}, status=400)
+    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+        return Response({'error': f'limit must be between 1 and {MAX_SEARCH_RESULTS}'}, status=400)
+
+    dataset = DATASET.current()
+    matches = dataset.search.search(query, limit)
+    return Response({
+        'query': query,
+        'results': [
+            {'id': prog_id, **dataset.catalogue.summary(prog_id), 'score': score}
+            for prog_id, score in matches
+        ],
+        'total_found': len(matches),
+    })
+
 # ------------------------
 # Health Check
 # ------------------------
 @api_view(['GET'])
 def check_database(request):
+    dataset = DATASET.current()
+    catalogue = dataset.catalogue
+    return Response({
+        'total_programmes': len(catalogue),
+        'dataset': DATASET.status(),
+        'catalogue_memory': catalogue.memory_report(),
+        'search_index_bytes': dataset.search.memory_bytes() if dataset.search else 0,
+        'requirement_signatures': catalogue.num_signatures,
+        'duplicate_codes': catalogue.duplicate_codes(),
+        'eligibility_cache': RESULT_CACHE.stats(),
+        'cluster_score_cache': CLUSTER_SCORE_CACHE.stats(),
+        'result_store': RESULT_STORE.stats(),
+        'pdf_cache': PDF_CACHE.stats(),
+        'pdf_jobs': PDF_JOBS.stats(),
+        'message': 'Programme data loaded successfully.' if catalogue else 'No programme data loaded.'
+    })
+
+# ------------------------
+# Dataset Reload (admin)
+# ------------------------
+@api_view(['POST'])
+def reload_dataset(request):
+    """
+    Rebuild the programme dataset now instead of waiting for the periodic file check.
+    Requires the X-Reload-Token header to match settings.DATASET_RELOAD_TOKEN; the
+    endpoint is disabled while that setting is empty. Only reloads the worker that
+    serves the request; the others pick the change up through their own file check.
+    """
+    token = getattr(settings, 'DATASET_RELOAD_TOKEN', '')
+    supplied = request.headers.get('X-Reload-Token', '')
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        return Response({'error': 'Not allowed'}, status=403)
+
+    previous_version = DATASET.current().version
+    dataset = DATASET.reload()
     return Response({
-        'total_programmes': len(ALL_PROGRAMMES),
-        'message': 'Programme data loaded successfully.' if ALL_PROGRAMMES else 'No programme data loaded.'
+        'dataset': DATASET.status(),
+        'changed': dataset.version != previous_version,
+        'total_programmes': len(dataset.catalogue),
     })
 
 # ------------------------
@@ -334,16 +1357,26 @@ def pay(request):
 # ------------------------
 # PDF DOWNLOAD
 # ------------------------
-@api_view(['POST'])
-def download_courses_pdf(request):
-    try:
-        data = request.data or {}
+def pdf_report_input(data: dict):
+    """
+    ((sorted_unis, total courses, cluster points), None) from a download request, which
+    carries either a stored result_id or the eligible_programmes list itself;
+    (None, error Response) when it cannot be used.
+    """
+    result_id = data.get('result_id')
+
+    if result_id:
+        # A result stored by check_eligibility, already grouped by university
+        stored = RESULT_STORE.get(str(result_id))
+        if stored is None:
+            return None, Response({'error': 'Result not found or expired, check eligibility again'}, status=404)
+        sorted_unis = stored.by_university()
+        eligible_programmes = stored.prog_ids
+        user_cluster_points = stored.cluster_points
+    else:
         eligible_programmes = data.get('eligible_programmes', [])
         user_cluster_points = data.get('cluster_points', 0)
 
-        if not eligible_programmes:
-            return Response({'error': 'No courses to download'}, status=400)
-
         # Group courses by university
         grouped = {}
         for course in eligible_programmes:
@@ -353,116 +1386,93 @@ def download_courses_pdf(request):
         # Sort universities (highest → lowest number of courses)
         sorted_unis = sorted(grouped.items(), key=lambda x: len(x[1]), reverse=True)
 
-        # PDF Setup
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        # -------------------------
-        # PAGE 1 — SUMMARY PAGE
-        # -------------------------
-        p.setFont("Helvetica-Bold", 18)
-        p.drawString(100, 750, "Eligible Course Report")
-
-        p.setFont("Helvetica", 12)
-        p.drawString(100, 720, f"Cluster Points: {user_cluster_points}")
-        p.drawString(100, 700, f"Total Universities: {len(sorted_unis)}")
-        p.drawString(100, 680, f"Total Courses: {len(eligible_programmes)}")
-
-        # University list (top to bottom)
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(100, 640, "Universities You Qualify For:")
-
-        y = 620
-        p.setFont("Helvetica", 10)
-
-        for index, (uni, uni_courses) in enumerate(sorted_unis, start=1):
-            line = f"{index}. {uni}  ......  {len(uni_courses)} courses"
-
-            if y < 60:
-                p.showPage()
-                y = 750
-                p.setFont("Helvetica-Bold", 14)
-                p.drawString(100, 750, "Universities You Qualify For (continued):")
-                y -= 40
-                p.setFont("Helvetica", 10)
-
-            p.drawString(100, y, line)
-            y -= 15
-
-        p.showPage()  # Move to course list pages
-
-        # -------------------------------------
-        # PAGE 2 → Detailed pages per university
-        # -------------------------------------
-        def wrap_text(text, max_width, pdf):
-            """
-            Wraps long text to fit page width.
-            Uses small indentation for wrapped lines.
-            """
-            words = text.split()
-            lines = []
-            current = words[0]
-
-            for word in words[1:]:
-                if pdf.stringWidth(current + " " + word, "Helvetica", 10) < max_width:
-                    current += " " + word
-                else:
-                    lines.append(current)
-                    current = word
-            lines.append(current)
-            return lines
-
-        for uni, uni_courses in sorted_unis:
-
-            # Sort courses alphabetically
-            uni_courses = sorted(uni_courses, key=lambda c: c.get("programme_name", ""))
-
-            p.setFont("Helvetica-Bold", 14)
-            p.drawString(100, 750, uni)
-
-            y = 720
-            p.setFont("Helvetica", 10)
-
-            for i, course in enumerate(uni_courses, start=1):
-
-                name = course.get("programme_name", "Unknown Programme")
-                code = course.get("programme_code", "N/A")
-                points = course.get("cluster_points", "N/A")
-
-                text = f"{i}. {name} ({code}) – {points} pts"
-
-                # Wrap long programme names
-                wrapped = wrap_text(text, 420, p)  # fit within width
-
-                for line_index, line in enumerate(wrapped):
-                    if y < 50:
-                        p.showPage()
-                        p.setFont("Helvetica-Bold", 14)
-                        p.drawString(100, 750, f"{uni} (continued)")
-                        p.setFont("Helvetica", 10)
-                        y = 720
-
-                    # indent continuation line
-                    if line_index > 0:
-                        p.drawString(120, y, line)   # small indent
-                    else:
-                        p.drawString(100, y, line)
+    if not eligible_programmes:
+        return None, Response({'error': 'No courses to download'}, status=400)
+    return (sorted_unis, len(eligible_programmes), user_cluster_points), None
 
-                    y -= 14
+def pdf_download_response(pdf_file, filename):
+    """Stream a rendered report from its file object in chunks; the file is closed afterwards."""
+    return FileResponse(pdf_file, as_attachment=True, filename=filename, content_type="application/pdf")
 
-                y -= 5  # small spacing after each course entry
+@api_view(['POST'])
+def download_courses_pdf(request):
+    try:
+        report, error = pdf_report_input(request.data or {})
+        if error:
+            return error
+        sorted_unis, total_courses, user_cluster_points = report
+
+        # Identical reports (same courses and points) are rendered once and then served from cache.
+        # Either way the response streams from a file object rather than a copy in memory.
+        key = report_key(sorted_unis, user_cluster_points)
+        pdf_file = PDF_CACHE.open(key)
+        if pdf_file is None:
+            pdf_file = spool_courses_pdf(sorted_unis, total_courses, user_cluster_points)
+            PDF_CACHE.put_file(key, pdf_file)
+        return pdf_download_response(pdf_file, f"eligible_courses_{user_cluster_points}.pdf")
 
-            p.showPage()
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
 
-        # Save PDF
-        p.save()
-        pdf = buffer.getvalue()
-        buffer.close()
+# ------------------------
+# PDF JOBS (background rendering)
+# ------------------------
+@api_view(['POST'])
+def submit_pdf_job(request):
+    """
+    Same body as download-pdf. Returns 202 with a job id to poll instead of the PDF,
+    or 429 while this worker's render queue is full.
+    """
+    try:
+        report, error = pdf_report_input(request.data or {})
+        if error:
+            return error
+        sorted_unis, total_courses, user_cluster_points = report
+
+        key = report_key(sorted_unis, user_cluster_points)
+        cached = PDF_CACHE.open(key)
+        try:
+            job_id = PDF_JOBS.submit(
+                sorted_unis, total_courses, user_cluster_points,
+                filename=f"eligible_courses_{user_cluster_points}.pdf",
+                cached_pdf=cached,
+                on_ready=lambda pdf: PDF_CACHE.put(key, pdf),
+            )
+        except QueueFull:
+            response = Response({'error': 'Too many PDF reports being prepared, try again shortly'}, status=429)
+            response['Retry-After'] = '5'
+            return response
+        finally:
+            if cached is not None:
+                cached.close()
 
-        response = HttpResponse(pdf, content_type="application/pdf")
-        response['Content-Disposition'] = f'attachment; filename=\"eligible_courses_{user_cluster_points}.pdf\"'
-        return response
+        return Response({
+            'job_id': job_id,
+            'status': PDF_JOBS.status(job_id)['status'],
+            'status_url': f'/api/pdf-jobs/{job_id}/',
+            'download_url': f'/api/pdf-jobs/{job_id}/download/',
+        }, status=202)
 
     except Exception as e:
         return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+def pdf_job_status(request, job_id):
+    record = PDF_JOBS.status(job_id)
+    if record is None:
+        return Response({'error': 'Job not found or expired'}, status=404)
+    return Response({key: record.get(key) for key in ('job_id', 'status', 'error') if record.get(key) is not None})
+
+@api_view(['GET'])
+def download_pdf_job(request, job_id):
+    record = PDF_JOBS.status(job_id)
+    if record is None:
+        return Response({'error': 'Job not found or expired'}, status=404)
+    if record['status'] != 'ready':
+        return Response({'job_id': job_id, 'status': record['status'], 'error': record.get('error')}, status=409)
+
+    result = PDF_JOBS.result(job_id)
+    if result is None:
+        return Response({'error': 'Job not found or expired'}, status=404)
+    pdf_file, filename = result
+    return pdf_download_response(pdf_file, filename or 'eligible_courses.pdf')
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,6 +77,37 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = 'static/'
+
+# Eligibility engine: "python" (compiled loop) or "numpy" (vectorized)
+ELIGIBILITY_ENGINE = os.getenv("ELIGIBILITY_ENGINE", "python")
+
+# Compiled programme catalogue that every worker memory-maps; "" keeps it in process memory
+CATALOGUE_SNAPSHOT_PATH = os.getenv("CATALOGUE_SNAPSHOT_PATH", str(BASE_DIR / "data" / "cache" / "catalogue.bin"))
+
+# Seconds between per-worker checks for a changed CSV/snapshot (0 disables hot reload)
+DATASET_CHECK_INTERVAL = int(os.getenv("DATASET_CHECK_INTERVAL", "30"))
+# Shared secret for POST /api/reload-dataset/ (X-Reload-Token header); empty disables it
+DATASET_RELOAD_TOKEN = os.getenv("DATASET_RELOAD_TOKEN", "")
+
+# Eligibility result cache (entries, seconds); size 0 disables it
+ELIGIBILITY_CACHE_SIZE = int(os.getenv("ELIGIBILITY_CACHE_SIZE", "4096"))
+ELIGIBILITY_CACHE_TTL = int(os.getenv("ELIGIBILITY_CACHE_TTL", "600"))
+# Results kept for the PDF endpoint under a result_id (entries, seconds)
+ELIGIBILITY_RESULT_STORE_SIZE = int(os.getenv("ELIGIBILITY_RESULT_STORE_SIZE", "1000"))
+ELIGIBILITY_RESULT_TTL = int(os.getenv("ELIGIBILITY_RESULT_TTL", "900"))
+
+# Rendered PDF reports: hot ones in memory, the rest on local disk ("" disables the disk tier)
+PDF_CACHE_MEMORY_BYTES = int(os.getenv("PDF_CACHE_MEMORY_BYTES", str(32 << 20)))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", str(BASE_DIR / "data" / "cache" / "pdf"))
+PDF_CACHE_DISK_BYTES = int(os.getenv("PDF_CACHE_DISK_BYTES", str(512 << 20)))
+
+# Background PDF jobs: render processes and queued jobs per web worker, and where job
+# state lives (shared by every worker on the box; no broker needed)
+PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", "2"))
+PDF_JOB_MAX_PENDING = int(os.getenv("PDF_JOB_MAX_PENDING", "16"))
+PDF_JOB_DIR = os.getenv("PDF_JOB_DIR", str(BASE_DIR / "data" / "cache" / "pdf-jobs"))
+PDF_JOB_TTL = int(os.getenv("PDF_JOB_TTL", "900"))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS settings
@@ -0,0 +1,9 @@
+# Picked up automatically by gunicorn when started from the project root.
+
+
+def post_worker_init(worker):
+    """Load the programme dataset before the worker accepts its first request."""
+    from course_pilot.courses.views import DATASET
+
+    seconds = DATASET.warm_up()
+    worker.log.info("Programme dataset ready in %.1f ms", seconds * 1000)